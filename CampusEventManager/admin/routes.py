@@ -1,6 +1,7 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
 from models import data_store, User
 from utils import login_required, send_notification
+from pagination import page_args
 from werkzeug.security import generate_password_hash
 from datetime import datetime, timedelta
 
@@ -10,17 +11,17 @@ admin_bp = Blueprint('admin', __name__)
 @login_required('admin')
 def dashboard():
     # Calculate statistics
-    total_users = len([u for u in data_store.users.values() if u['role'] != 'admin'])
+    total_users = len(data_store.users) - data_store.count_users('admin')
     total_events = len(data_store.events)
-    pending_events = len([e for e in data_store.events.values() if e['status'] == 'pending'])
+    pending_events = len([e for e in data_store.records('events') if e['status'] == 'pending'])
     total_registrations = len(data_store.registrations)
     
     # Recent activity
-    recent_events = sorted(data_store.events.values(), 
+    recent_events = sorted(data_store.records('events'), 
                           key=lambda x: x['created_at'], reverse=True)[:5]
     
     recent_registrations = []
-    recent_regs = sorted(data_store.registrations.values(), 
+    recent_regs = sorted(data_store.records('registrations'), 
                         key=lambda x: x['registered_at'], reverse=True)[:5]
     for reg in recent_regs:
         user = data_store.users.get(reg['user_id'], {})
@@ -46,23 +47,25 @@ def dashboard():
 @admin_bp.route('/approve-events')
 @login_required('admin')
 def approve_events():
-    # Get all events with organizer details
+    status = request.args.get('status', 'pending')
+    cursor, per_page = page_args(request.args)
+
+    # One page of the selected tab's events, newest first, with organizer details
+    events, next_cursor = data_store.page(
+        'events', 'status_created', cursor, per_page, reverse=True, prefix=(status,))
     events_with_organizers = []
-    for event_id, event in data_store.events.items():
+    for event in events:
         organizer = data_store.users.get(event['organizer_id'], {})
         events_with_organizers.append({
             'event': event,
             'organizer': organizer
         })
     
-    # Sort by status (pending first) and then by creation date
-    events_with_organizers.sort(key=lambda x: (
-        0 if x['event']['status'] == 'pending' else 1,
-        x['event']['created_at']
-    ), reverse=True)
-    
     return render_template('admin/approve_events.html', 
-                         events_with_organizers=events_with_organizers)
+                         events_with_organizers=events_with_organizers,
+                         next_cursor=next_cursor,
+                         status_counts=data_store.counter_totals('events', 'status'),
+                         current_status=status)
 
 @admin_bp.route('/approve-event/<event_id>', methods=['POST'])
 @login_required('admin')
@@ -76,11 +79,12 @@ def approve_event(event_id):
         flash('Event is not pending approval', 'warning')
         return redirect(url_for('admin.approve_events'))
     
-    event['status'] = 'approved'
-    
-    # Send notification to organizer
-    send_notification(event['organizer_id'], 'Event Approved', 
-                     f'Your event "{event["title"]}" has been approved!')
+    # Approve and notify the organizer as one commit
+    with data_store.transaction():
+        event['status'] = 'approved'
+        data_store.update_event(event_id, event)
+        send_notification(event['organizer_id'], 'Event Approved', 
+                         f'Your event "{event["title"]}" has been approved!')
     
     flash('Event approved successfully', 'success')
     return redirect(url_for('admin.approve_events'))
@@ -98,12 +102,13 @@ def reject_event(event_id):
         return redirect(url_for('admin.approve_events'))
     
     reason = request.form.get('reason', 'No reason provided')
-    event['status'] = 'rejected'
-    event['rejection_reason'] = reason
-    
-    # Send notification to organizer
-    send_notification(event['organizer_id'], 'Event Rejected', 
-                     f'Your event "{event["title"]}" has been rejected. Reason: {reason}')
+    # Reject and notify the organizer as one commit
+    with data_store.transaction():
+        event['status'] = 'rejected'
+        event['rejection_reason'] = reason
+        data_store.update_event(event_id, event)
+        send_notification(event['organizer_id'], 'Event Rejected', 
+                         f'Your event "{event["title"]}" has been rejected. Reason: {reason}')
     
     flash('Event rejected successfully', 'success')
     return redirect(url_for('admin.approve_events'))
@@ -111,13 +116,24 @@ def reject_event(event_id):
 @admin_bp.route('/user-management')
 @login_required('admin')
 def user_management():
-    # Get all users except admins
-    users = [u for u in data_store.users.values() if u['role'] != 'admin']
-    
-    # Sort by creation date
-    users.sort(key=lambda x: x['created_at'], reverse=True)
+    role = request.args.get('role', '')
+    cursor, per_page = page_args(request.args)
+
+    # One page of the users (admins excluded) of the selected tab, newest first
+    if role:
+        users, next_cursor = data_store.page(
+            'users', 'role_created', cursor, per_page, reverse=True, prefix=(role,))
+    else:
+        users, next_cursor = data_store.page('users', 'created', cursor, per_page, reverse=True)
+
+    active = data_store.counter_totals('users', 'active')
+    active.pop('admin', None)
     
-    return render_template('admin/user_management.html', users=users)
+    return render_template('admin/user_management.html', users=users,
+                           next_cursor=next_cursor,
+                           role_counts=data_store.counter_totals('users', 'role'),
+                           active_count=sum(active.values()),
+                           current_role=role)
 
 @admin_bp.route('/create-organizer', methods=['POST'])
 @login_required('admin')
@@ -127,24 +143,25 @@ def create_organizer():
     password = request.form['password']
     department = request.form['department']
     
-    # Check if email already exists
-    for uid, user in data_store.users.items():
-        if user['email'] == email:
-            flash('Email already exists', 'error')
-            return redirect(url_for('admin.user_management'))
-    
     # Create new organizer
     user = User(username, email, generate_password_hash(password), 'organizer')
-    data_store.users[user.id] = {
-        'id': user.id,
-        'username': user.username,
-        'email': user.email,
-        'password_hash': user.password_hash,
-        'role': user.role,
-        'created_at': user.created_at,
-        'is_active': user.is_active,
-        'department': department
-    }
+
+    # Check and insert under the lock, so concurrent requests can't both
+    # claim the email
+    with data_store.write_lock():
+        if data_store.get_user_by_email(email):
+            flash('Email already exists', 'error')
+            return redirect(url_for('admin.user_management'))
+        data_store.add_user(user.id, {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'password_hash': user.password_hash,
+            'role': user.role,
+            'created_at': user.created_at,
+            'is_active': user.is_active,
+            'department': department
+        })
     
     flash('Organizer created successfully', 'success')
     return redirect(url_for('admin.user_management'))
@@ -157,7 +174,9 @@ def toggle_user_status(user_id):
         flash('User not found or unauthorized action', 'error')
         return redirect(url_for('admin.user_management'))
     
-    user['is_active'] = not user['is_active']
+    with data_store.write_lock():
+        user['is_active'] = not user['is_active']
+        data_store.update_user(user_id, user)
     status = 'activated' if user['is_active'] else 'deactivated'
     
     flash(f'User {status} successfully', 'success')
@@ -170,33 +189,27 @@ def reports():
     
     # User statistics by role
     user_stats = {
-        'students': len([u for u in data_store.users.values() if u['role'] == 'student']),
-        'organizers': len([u for u in data_store.users.values() if u['role'] == 'organizer']),
-        'total': len([u for u in data_store.users.values() if u['role'] != 'admin'])
+        'students': data_store.count_users('student'),
+        'organizers': data_store.count_users('organizer'),
+        'total': len(data_store.users) - data_store.count_users('admin')
     }
     
     # Event statistics
     event_stats = {
         'total': len(data_store.events),
-        'approved': len([e for e in data_store.events.values() if e['status'] == 'approved']),
-        'pending': len([e for e in data_store.events.values() if e['status'] == 'pending']),
-        'rejected': len([e for e in data_store.events.values() if e['status'] == 'rejected'])
+        'approved': len([e for e in data_store.records('events') if e['status'] == 'approved']),
+        'pending': len([e for e in data_store.records('events') if e['status'] == 'pending']),
+        'rejected': len([e for e in data_store.records('events') if e['status'] == 'rejected'])
     }
     
     # Registration statistics
     reg_stats = {
         'total': len(data_store.registrations),
-        'attended': len([r for r in data_store.registrations.values() if r['attended']])
+        'attended': sum(data_store.counter_totals('registrations', 'event_attended').values())
     }
     
     # Popular events (by registration count)
-    event_popularity = {}
-    for reg in data_store.registrations.values():
-        event_id = reg['event_id']
-        if event_id in event_popularity:
-            event_popularity[event_id] += 1
-        else:
-            event_popularity[event_id] = 1
+    event_popularity = data_store.counter_totals('registrations', 'event_id')
     
     popular_events = []
     for event_id, count in sorted(event_popularity.items(), 
@@ -210,7 +223,7 @@ def reports():
     
     # Events by category
     category_stats = {}
-    for event in data_store.events.values():
+    for event in data_store.records('events'):
         category = event['category']
         if category in category_stats:
             category_stats[category] += 1
@@ -221,7 +234,7 @@ def reports():
     monthly_trends = {}
     six_months_ago = datetime.now() - timedelta(days=180)
     
-    for reg in data_store.registrations.values():
+    for reg in data_store.records('registrations'):
         if reg['registered_at'] >= six_months_ago:
             month_key = reg['registered_at'].strftime('%Y-%m')
             if month_key in monthly_trends:
@@ -236,3 +249,21 @@ def reports():
                          popular_events=popular_events,
                          category_stats=category_stats,
                          monthly_trends=monthly_trends)
+
+@admin_bp.route('/storage-metrics')
+@login_required('admin')
+def storage_metrics():
+    # Commit counts, batch sizes and latencies of the data store
+    return jsonify(data_store.get_commit_metrics())
+
+@admin_bp.route('/storage-check', methods=['GET', 'POST'])
+@login_required('admin')
+def storage_check():
+    # Recount the data store's counters; POST also repairs any mismatch
+    problems = data_store.check_counters(repair=request.method == 'POST')
+    return jsonify({
+        'consistent': not problems,
+        'repaired': bool(problems) and request.method == 'POST',
+        'problems': [dict(zip(('collection', 'counter', 'key', 'stored', 'actual'), problem))
+                     for problem in problems]
+    })
@@ -1,15 +1,28 @@
 import os
 import logging
-from flask import Flask, render_template, redirect, url_for, session
+from flask import Flask, render_template, redirect, url_for, session, request
+from flask.json.provider import DefaultJSONProvider
 from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_moment import Moment
 from datetime import datetime
+from records import Record
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 
+class RecordJSONProvider(DefaultJSONProvider):
+    """JSON for jsonify and the tojson filter that also encodes data store
+    records, which are __slots__ objects rather than dicts"""
+
+    @staticmethod
+    def default(value):
+        if isinstance(value, Record):
+            return value.to_dict()
+        return DefaultJSONProvider.default(value)
+
 # Create Flask app
 app = Flask(__name__)
+app.json = RecordJSONProvider(app)
 moment = Moment(app)    
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
@@ -24,6 +37,7 @@ from student.routes import student_bp
 from student.team_routes import team_bp
 from organizer.routes import organizer_bp
 from admin.routes import admin_bp
+from models import data_store
 
 app.register_blueprint(auth_bp, url_prefix='/auth')
 app.register_blueprint(student_bp, url_prefix='/student')
@@ -31,6 +45,11 @@ app.register_blueprint(team_bp, url_prefix='/team')
 app.register_blueprint(organizer_bp, url_prefix='/organizer')
 app.register_blueprint(admin_bp, url_prefix='/admin')
 
+@app.before_request
+def refresh_data_store():
+    """Pick up changes written to shared storage by other worker processes"""
+    data_store.refresh()
+
 @app.template_filter('strftime')
 def datetime_filter(value, format='%B %d, %Y at %I:%M %p'):
     """Template filter to safely format datetime objects"""
@@ -43,6 +62,16 @@ def datetime_filter(value, format='%B %d, %Y at %I:%M %p'):
         return value.strftime(format)
     return value
 
+@app.template_global()
+def page_url(cursor=None):
+    """URL of the current listing, with the same filters, at page ``cursor``
+    (the first page without one)"""
+    args = request.args.to_dict()
+    args.pop('cursor', None)
+    if cursor:
+        args['cursor'] = cursor
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -13,11 +13,7 @@ def student_login():
         password = request.form['password']
 
         # Find user by email
-        user = None
-        for uid, u in data_store.users.items():
-            if u['email'] == email and u['role'] == 'student':
-                user = u
-                break
+        user = data_store.get_user_by_email(email, 'student')
 
         if user and check_password_hash(user['password_hash'], password):
             session['user_id'] = user['id']
@@ -57,15 +53,6 @@ def register():
                                  firebase_project_id=os.environ.get('FIREBASE_PROJECT_ID'),
                                  firebase_app_id=os.environ.get('FIREBASE_APP_ID'))
 
-        # Check if email already exists
-        for uid, user in data_store.users.items():
-            if user['email'] == email:
-                flash('Email already registered', 'error')
-                return render_template('auth/register.html',
-                                     firebase_api_key=os.environ.get('FIREBASE_API_KEY'),
-                                     firebase_project_id=os.environ.get('FIREBASE_PROJECT_ID'),
-                                     firebase_app_id=os.environ.get('FIREBASE_APP_ID'))
-
         # Get role-specific fields
         register_number = None
         department = None
@@ -101,7 +88,16 @@ def register():
         if role == 'organizer':
             user_data['organization'] = organization
 
-        data_store.add_user(user.id, user_data)
+        # Check and insert under the lock, so concurrent sign-ups can't
+        # both claim the email
+        with data_store.write_lock():
+            if data_store.get_user_by_email(email):
+                flash('Email already registered', 'error')
+                return render_template('auth/register.html',
+                                     firebase_api_key=os.environ.get('FIREBASE_API_KEY'),
+                                     firebase_project_id=os.environ.get('FIREBASE_PROJECT_ID'),
+                                     firebase_app_id=os.environ.get('FIREBASE_APP_ID'))
+            data_store.add_user(user.id, user_data)
 
         flash(f'{role.title()} registration successful! Please login.', 'success')
         return redirect(url_for('index'))
@@ -118,11 +114,7 @@ def organizer_login():
         password = request.form['password']
 
         # Find user by email
-        user = None
-        for uid, u in data_store.users.items():
-            if u['email'] == email and u['role'] == 'organizer':
-                user = u
-                break
+        user = data_store.get_user_by_email(email, 'organizer')
 
         if user and check_password_hash(user['password_hash'], password):
             session['user_id'] = user['id']
@@ -145,11 +137,7 @@ def admin_login():
         password = request.form['password']
 
         # Find user by email
-        user = None
-        for uid, u in data_store.users.items():
-            if u['email'] == email and u['role'] == 'admin':
-                user = u
-                break
+        user = data_store.get_user_by_email(email, 'admin')
 
         if user and check_password_hash(user['password_hash'], password):
             session['user_id'] = user['id']
@@ -183,12 +171,6 @@ def admin_register():
         flash('Passwords do not match', 'error')
         return redirect(url_for('auth.admin_login'))
 
-    # Check if email already exists
-    for uid, user in data_store.users.items():
-        if user['email'] == email:
-            flash('Email already registered', 'error')
-            return redirect(url_for('auth.admin_login'))
-
     # Create new admin user
     user = User(full_name, email, generate_password_hash(password), 'admin', None, None, full_name)
     user_data = {
@@ -204,7 +186,13 @@ def admin_register():
         'department': user.department
     }
 
-    data_store.add_user(user.id, user_data)
+    # Check and insert under the lock, so concurrent sign-ups can't both
+    # claim the email
+    with data_store.write_lock():
+        if data_store.get_user_by_email(email):
+            flash('Email already registered', 'error')
+            return redirect(url_for('auth.admin_login'))
+        data_store.add_user(user.id, user_data)
 
     flash('Admin registration successful! Please login with your new credentials.', 'success')
     return redirect(url_for('auth.admin_login'))
@@ -0,0 +1,53 @@
+import json
+from collections.abc import Mapping
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def parse_datetime(value):
+    """Decode an ISO-8601 string to a datetime; other values pass through"""
+    if type(value) is str and value:
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return value
+    return value
+
+
+def json_default(value):
+    """Encode values JSON has no type for: datetimes as ISO-8601, records as
+    objects, anything else as its string form"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Mapping):
+        return dict(value.items())
+    return str(value)
+
+
+def loads(text):
+    """Parse JSON text, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def load(f):
+    return loads(f.read())
+
+
+def dumps(obj, indent=False):
+    """Serialize ``obj`` to JSON text, compact unless ``indent`` is set"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=json_default,
+                            option=orjson.OPT_INDENT_2 if indent else 0).decode()
+    if indent:
+        return json.dumps(obj, indent=2, default=json_default)
+    return json.dumps(obj, separators=(',', ':'), default=json_default)
+
+
+def dump(obj, f, indent=False):
+    f.write(dumps(obj, indent))
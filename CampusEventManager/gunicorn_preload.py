@@ -0,0 +1,36 @@
+"""Gunicorn configuration for running with a preloaded, shared DataStore.
+
+    gunicorn -c gunicorn_preload.py main:app
+
+The app (and with it the DataStore) is imported once in the master. Before
+the workers are forked every collection is decoded and frozen for the GC,
+so workers share those pages copy-on-write instead of each loading the
+data file. Workers then only apply changes made by other workers, which
+needs a backend that shares them: DATASTORE_BACKEND=sqlite, or the json
+backend with DATASTORE_MULTIPROCESS=1.
+"""
+import gc
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 8))
+preload_app = True
+
+# Loading creates millions of long-lived objects and no cycles; collecting
+# while they are built is wasted work. Workers re-enable the GC.
+gc.disable()
+
+
+def when_ready(server):
+    from models import data_store
+    backend = os.environ.get('DATASTORE_BACKEND', 'json')
+    if backend != 'sqlite' and os.environ.get('DATASTORE_MULTIPROCESS', '').lower() not in ('1', 'true', 'yes'):
+        server.log.warning("Workers will not see each other's changes; use DATASTORE_BACKEND=sqlite "
+                           "or DATASTORE_MULTIPROCESS=1 with preloading")
+    data_store.prepare_for_fork()
+
+
+def post_fork(server, worker):
+    from models import data_store
+    data_store.after_fork()
+    gc.enable()
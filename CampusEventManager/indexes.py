@@ -0,0 +1,324 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from itertools import chain, islice, repeat
+
+
+def seek(entries, after=None, limit=None):
+    """Return the (key, record_id) ``entries`` following the entry ``after``
+    in key order; with ``limit`` only the first ``limit``, found without a
+    full sort"""
+    if after is not None:
+        entries = [entry for entry in entries if entry > after]
+    if limit is None:
+        return sorted(entries)
+    return heapq.nsmallest(limit, entries)
+
+
+class HashIndex:
+    """Map a key computed from each record to the ids of the records sharing it.
+
+    ``key_func`` returns the record's key, or None to leave the record out of
+    the index. With ``multi=True`` it returns an iterable of keys instead, for
+    records that belong under several keys (e.g. a team under each member).
+    The key(s) a record was indexed under are remembered, so a record that was
+    modified in place can still be unindexed correctly.
+    """
+
+    def __init__(self, key_func, multi=False):
+        self.key_func = key_func
+        self.multi = multi
+        self._ids = {}
+        self._keys = {}
+
+    def _keys_for(self, record):
+        if self.multi:
+            return [key for key in self.key_func(record) or () if key is not None]
+        key = self.key_func(record)
+        return [] if key is None else [key]
+
+    def add(self, record_id, record):
+        """Index ``record`` under its current key(s)"""
+        keys = self._keys_for(record)
+        if not keys:
+            return
+        self._keys[record_id] = keys
+        for key in keys:
+            # dicts double as insertion-ordered sets
+            self._ids.setdefault(key, {})[record_id] = True
+
+    def remove(self, record_id):
+        """Drop ``record_id`` from the key(s) it was indexed under"""
+        for key in self._keys.pop(record_id, ()):
+            ids = self._ids.get(key)
+            if ids is not None:
+                ids.pop(record_id, None)
+                if not ids:
+                    del self._ids[key]
+
+    def get(self, key):
+        """Return the ids indexed under ``key``"""
+        return list(self._ids.get(key, ()))
+
+    def count(self, key):
+        """Return how many records are indexed under ``key``"""
+        return len(self._ids.get(key, ()))
+
+    def ids(self, key):
+        """Return the ids under ``key`` as a read-only mapping, for set
+        operations without a copy; callers must hold the store's lock"""
+        return self._ids.get(key, {})
+
+    def groups(self):
+        """Return (key, ids) pairs for every key, ids as in ids()"""
+        return self._ids.items()
+
+    def keys_of(self, record_id):
+        """Return the key(s) ``record_id`` is indexed under"""
+        return list(self._keys.get(record_id, ()))
+
+    def totals(self):
+        """Return the number of records under each key"""
+        return {key: len(ids) for key, ids in self._ids.items()}
+
+    def key_counts(self, record_ids):
+        """Return how many of ``record_ids`` (a set) are indexed under each
+        key, every key included"""
+        if len(record_ids) * 8 < len(self._keys):
+            # Few ids: walk them and look up each one's key(s). In C, as a
+            # Python loop costs about as much per id as eight set probes.
+            counts = dict.fromkeys(self._ids, 0)
+            counts.update(Counter(chain.from_iterable(map(self._keys.get, record_ids, repeat(())))))
+            return counts
+        # Many: intersect them with the ids under each key, which probes
+        # no more than every indexed id once
+        return {key: len(ids.keys() & record_ids) for key, ids in self._ids.items()}
+
+    def empty(self):
+        """Return a new, empty index with the same key function"""
+        return HashIndex(self.key_func, self.multi)
+
+    def rebuild(self, records):
+        """Re-index every record in ``records``"""
+        self._ids = {}
+        self._keys = {}
+        if self.multi:
+            for record_id, record in records.items():
+                self.add(record_id, record)
+            return
+
+        # add() inlined for the single-key case; this runs over every record
+        # at startup
+        key_func = self.key_func
+        ids = self._ids
+        keys = self._keys
+        for record_id, record in records.items():
+            key = key_func(record)
+            if key is None:
+                continue
+            keys[record_id] = [key]
+            bucket = ids.get(key)
+            if bucket is None:
+                bucket = ids[key] = {}
+            bucket[record_id] = True
+
+
+class CountIndex:
+    """Running total per key: each record adds ``value_func(record)`` (1 by
+    default, making it a count) to the total of its key, so aggregates such
+    as an event's attendance or rating sum are read without a scan.
+
+    ``key_func`` returns the record's key, or None to leave it out. What each
+    record contributed is remembered, so it can be subtracted again after
+    the record was modified in place.
+    """
+
+    def __init__(self, key_func, value_func=None):
+        self.key_func = key_func
+        self.value_func = value_func
+        self._totals = {}
+        self._contributions = {}
+
+    def add(self, record_id, record):
+        """Add ``record``'s current value to the total of its key"""
+        key = self.key_func(record)
+        if key is None:
+            return
+        value = self.value_func(record) if self.value_func else 1
+        self._contributions[record_id] = (key, value)
+        self._totals[key] = self._totals.get(key, 0) + value
+
+    def remove(self, record_id):
+        """Subtract what ``record_id`` added"""
+        contribution = self._contributions.pop(record_id, None)
+        if contribution is None:
+            return
+        key, value = contribution
+        total = self._totals.get(key, 0) - value
+        if total:
+            self._totals[key] = total
+        else:
+            self._totals.pop(key, None)
+
+    def total(self, key):
+        """Return the total of ``key``"""
+        return self._totals.get(key, 0)
+
+    def keys_of(self, record_id):
+        """Return the key ``record_id`` was counted under, as a list"""
+        contribution = self._contributions.get(record_id)
+        return [] if contribution is None else [contribution[0]]
+
+    def totals(self):
+        """Return the total of every key"""
+        return dict(self._totals)
+
+    def empty(self):
+        """Return a new, empty index with the same functions"""
+        return CountIndex(self.key_func, self.value_func)
+
+    def rebuild(self, records):
+        """Recompute the totals from every record in ``records``"""
+        # add() inlined; this runs over every record at startup
+        key_func = self.key_func
+        value_func = self.value_func
+        totals = self._totals = {}
+        contributions = self._contributions = {}
+        for record_id, record in records.items():
+            key = key_func(record)
+            if key is None:
+                continue
+            value = value_func(record) if value_func else 1
+            contributions[record_id] = (key, value)
+            totals[key] = totals.get(key, 0) + value
+
+
+class SortedIndex:
+    """Record ids kept ordered by a key computed from each record, for range
+    and top-k queries without a scan or a sort.
+
+    ``key_func`` returns the record's sort key, or None to leave the record
+    out. Entries are (key, record_id) pairs in a sorted list, found by
+    bisection; ties are ordered by id.
+    """
+
+    def __init__(self, key_func):
+        self.key_func = key_func
+        self._entries = []
+        self._keys = {}
+
+    def add(self, record_id, record):
+        """Insert ``record`` at the position of its current key"""
+        key = self.key_func(record)
+        if key is None:
+            return
+        self._keys[record_id] = key
+        insort(self._entries, (key, record_id))
+
+    def remove(self, record_id):
+        """Drop ``record_id`` from the position it was indexed at"""
+        key = self._keys.pop(record_id, None)
+        if key is None:
+            return
+        i = bisect_left(self._entries, (key, record_id))
+        if i < len(self._entries) and self._entries[i] == (key, record_id):
+            del self._entries[i]
+
+    def between(self, start=None, end=None, limit=None):
+        """Return the ids with ``start <= key < end`` in key order; either
+        bound may be None for an open range"""
+        entries = self._entries
+        lo = 0 if start is None else bisect_left(entries, (start,))
+        hi = len(entries) if end is None else bisect_left(entries, (end,))
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return [record_id for _, record_id in entries[lo:hi]]
+
+    def after(self, key, limit=None):
+        """Return the ids with a key greater than ``key`` in key order"""
+        entries = self._entries
+        i = bisect_left(entries, (key,))
+        while i < len(entries) and entries[i][0] == key:
+            i += 1
+        stop = len(entries) if limit is None else i + limit
+        return [record_id for _, record_id in entries[i:stop]]
+
+    def page(self, after=None, limit=None, reverse=False, prefix=None):
+        """Return up to ``limit`` (key, record_id) entries following the entry
+        ``after`` in key order, or preceding it in reverse order with
+        ``reverse``. Without ``after`` the page starts at the first (or last)
+        entry. With ``prefix``, keys are tuples and only those starting with
+        ``prefix`` are returned, e.g. the events of one status under (status,
+        date) keys."""
+        entries = self._entries
+        lo, hi = 0, len(entries)
+        if prefix is not None:
+            lo = bisect_left(entries, (prefix,))
+            hi = self._prefix_end(prefix, lo)
+        if reverse:
+            if after is not None:
+                hi = max(lo, min(hi, bisect_left(entries, after)))
+            start = lo if limit is None else max(lo, hi - limit)
+            return entries[start:hi][::-1]
+        if after is not None:
+            lo = min(hi, max(lo, bisect_right(entries, after)))
+        stop = hi if limit is None else min(hi, lo + limit)
+        return entries[lo:stop]
+
+    def _prefix_end(self, prefix, lo):
+        # Index past the last key starting with ``prefix``, searching from lo
+        entries = self._entries
+        size = len(prefix)
+        hi = len(entries)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if entries[mid][0][:size] <= prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def select(self, record_ids, after=None, limit=None):
+        """Return the (key, record_id) entries of the indexed ids among
+        ``record_ids`` (a set), as seek() does"""
+        entries = self._entries
+        if limit is not None and limit * len(entries) < len(record_ids) ** 2:
+            # Dense selection: walking the index from ``after`` fills the
+            # page after about limit * len(entries) / len(record_ids) steps
+            start = 0 if after is None else bisect_right(entries, after)
+            found = []
+            for entry in islice(entries, start, None):
+                if entry[1] in record_ids:
+                    found.append(entry)
+                    if len(found) == limit:
+                        break
+            return found
+        keys = self._keys
+        return seek([(keys[record_id], record_id) for record_id in record_ids
+                     if record_id in keys], after, limit)
+
+    def keys_of(self, record_id):
+        """Return the key ``record_id`` is indexed under, as a list"""
+        key = self._keys.get(record_id)
+        return [] if key is None else [key]
+
+    def totals(self):
+        """Return the number of records under each key"""
+        totals = {}
+        for key, _ in self._entries:
+            totals[key] = totals.get(key, 0) + 1
+        return totals
+
+    def empty(self):
+        """Return a new, empty index with the same key function"""
+        return SortedIndex(self.key_func)
+
+    def rebuild(self, records):
+        """Re-index every record in ``records``"""
+        key_func = self.key_func
+        keys = self._keys = {}
+        for record_id, record in records.items():
+            key = key_func(record)
+            if key is not None:
+                keys[record_id] = key
+        self._entries = sorted((key, record_id) for record_id, key in keys.items())
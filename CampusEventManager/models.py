@@ -1,28 +1,162 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 import uuid
-import json
 import os
+import atexit
+import gc
+import threading
+import time
+from contextlib import contextmanager
+from storage import create_storage
+from indexes import CountIndex, HashIndex, SortedIndex, seek
+from locks import RWLock
+from pagination import PAGE_SIZE, decode_cursor, encode_cursor
+from search import PrefixIndex, TextIndex
+from records import Record, set_capture
 
-def convert_datetime_strings(obj):
-    """Convert datetime strings back to datetime objects"""
-    if isinstance(obj, dict):
-        for key, value in obj.items():
-            if key.endswith('_at') or key.endswith('_date'):
-                if isinstance(value, str):
-                    try:
-                        obj[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
-                    except (ValueError, AttributeError):
-                        pass
-            elif isinstance(value, (dict, list)):
-                convert_datetime_strings(value)
-    elif isinstance(obj, list):
-        for item in obj:
-            convert_datetime_strings(item)
-    return obj
+def normalize_email(email):
+    """Return the case-insensitive lookup key for an email address"""
+    return email.strip().lower() if email else None
+
+def sort_time(value):
+    """A stored datetime as a sort key that compares with every other:
+    naive local time, and datetime.min (first) for anything else"""
+    if not isinstance(value, datetime):
+        return datetime.min
+    if value.tzinfo is not None:
+        # Order in local time, like the naive datetimes the app stores
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+def approved_start(event):
+    """Start time of an approved event for ordering, None for other events.
+    Events without a valid start date sort first, as in the event lists."""
+    if event.get('status') != 'approved':
+        return None
+    return sort_time(event.get('start_date'))
+
+def grouped_time(group_field, time_field):
+    """Index key function ordering records by ``time_field`` within each
+    value of ``group_field``, for SortedIndex.page(prefix=...)"""
+    def key(record):
+        group = record.get(group_field)
+        return None if group is None else (group, sort_time(record.get(time_field)))
+    return key
+
+def listed_user_created(user):
+    """Join time of a user for the admin user table, None for admins"""
+    if user.get('role') == 'admin':
+        return None
+    return sort_time(user.get('created_at'))
+
+def listed_user_role_created(user):
+    """Role and join time of a user for the admin user table's role tabs"""
+    role = user.get('role')
+    if role is None or role == 'admin':
+        return None
+    return (role, sort_time(user.get('created_at')))
+
+# Facets approved events can be filtered by, and each event's value
+EVENT_FACETS = {
+    'category': lambda e: e.get('category'),
+    'price': lambda e: 'paid' if e.get('is_paid') else 'free',
+    'format': lambda e: 'team' if e.get('is_competition') else 'individual',
+    'difficulty': lambda e: e.get('difficulty_level'),
+}
+
+def facet_key(facet):
+    """Index key function of a facet: its value for approved events only"""
+    value = EVENT_FACETS[facet]
+    return lambda event: value(event) if event.get('status') == 'approved' else None
+
+def facet_values(event):
+    """Index key of an approved event: its value of every facet, in
+    EVENT_FACETS order. Events share few such combinations, so facet counts
+    are summed over them rather than over events."""
+    if event.get('status') != 'approved':
+        return None
+    return tuple(value(event) for value in EVENT_FACETS.values())
+
+DATE_WINDOWS = ('today', 'this_week', 'this_month')
+
+def date_window(name, now=None):
+    """Return the (start, end) datetimes of a date filter: today, the next
+    seven days including today, or the current calendar month"""
+    today = (now or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    if name == 'today':
+        return today, today + timedelta(days=1)
+    if name == 'this_week':
+        return today, today + timedelta(days=8)
+    month_start = today.replace(day=1)
+    return month_start, (month_start + timedelta(days=32)).replace(day=1)
+
+# Event fields covered by search, and how much a match in each counts
+SEARCH_WEIGHTS = {'title': 3.0, 'tags': 2.0, 'skills_required': 2.0, 'category': 2.0,
+                  'venue': 1.0, 'description': 1.0}
+
+def event_search_fields(event):
+    """Searchable text of an approved event, None for other events"""
+    if event.get('status') != 'approved':
+        return None
+    return {field: event.get(field) for field in SEARCH_WEIGHTS}
+
+def event_suggestions(event):
+    """Typeahead phrases of an approved event: its title and category"""
+    if event.get('status') != 'approved':
+        return None
+    return [('event', event.get('title')), ('category', event.get('category'))]
+
+def organizer_suggestions(user):
+    """Typeahead phrase of an organizer: their name"""
+    if user.get('role') != 'organizer':
+        return None
+    return [('organizer', user.get('full_name') or user.get('username'))]
+
+COLLECTIONS = ('users', 'events', 'registrations', 'feedback', 'notifications',
+               'teams', 'submissions', 'achievements', 'leaderboards')
+
+# Records deleted along with a record of the key collection, as
+# (dependent collection, index of it keyed by the deleted record's id)
+CASCADES = {
+    'events': (('registrations', 'event_id'), ('feedback', 'event_id'),
+               ('teams', 'event_id'), ('submissions', 'event_id')),
+}
+
+# Stored fields that mirror a count: the field of the parent record whose
+# id is an index key always equals the number of records under that key
+COUNTER_FIELDS = {
+    ('registrations', 'event_id'): ('events', 'current_attendees'),
+}
+
+_ABSENT = object()
+
+
+class _Transaction:
+    """Undo log for one DataStore.transaction()"""
+
+    def __init__(self, changes):
+        self.thread = threading.get_ident()
+        # Pending changes when the transaction began
+        self.changes = dict(changes)
+        # (collection, record_id) -> the record stored there before, or _ABSENT
+        self.replaced = {}
+        # id(record) -> (record, its contents before the first in-place edit)
+        self.edited = {}
+        self.flush_requested = False
+        self.on_commit = []
+
+    def capture(self, record):
+        if threading.get_ident() == self.thread and id(record) not in self.edited:
+            self.edited[id(record)] = (record, record._save_state())
+
+    def replace(self, records, collection, record_id):
+        key = (collection, record_id)
+        if key not in self.replaced:
+            self.replaced[key] = records.get(record_id, _ABSENT)
 
 # Persistent storage using JSON files
 class DataStore:
-    def __init__(self, data_file='data/datastore.json'):
+    def __init__(self, data_file='data/datastore.json', backend='json', group_commit_ms=0,
+                 lazy=False, warm_up=False):
         # Ensure the data file path is relative to the CampusEventManager directory
         import os
         if not os.path.isabs(data_file):
@@ -41,15 +175,94 @@ class DataStore:
         self.achievements = {}
         self.leaderboards = {}
 
+        # Records changed since the last save, as (collection, record_id)
+        self._changes = {}
+
+        # Lazy loading: collections still in their stored form, decoded and
+        # indexed on first access (see __getattr__)
+        self.lazy = lazy
+        self._raw = {}
+        self._load_lock = threading.Lock()
+
+        # Readers share the lock; inserts, updates, deletes and in-place
+        # edits take it exclusively. Flushes serialize under the read lock,
+        # so they see a consistent state without blocking other readers.
+        # _flush_lock keeps flushes from overlapping each other.
+        self._lock = RWLock()
+        self._flush_lock = threading.Lock()
+
+        # Open transaction, if any (see transaction())
+        self._txn = None
+
+        # Group commit: save_data() only marks the store dirty and a
+        # background thread persists at most every group_commit_ms
+        self.group_commit_ms = group_commit_ms
+        self._dirty = threading.Event()
+        self.commit_metrics = {
+            'commits': 0,
+            'records': 0,
+            'last_batch_size': 0,
+            'max_batch_size': 0,
+            'last_latency_ms': 0.0,
+            'max_latency_ms': 0.0,
+            'total_latency_ms': 0.0,
+        }
+
+        # Secondary indexes, maintained on every insert, update and delete
+        self.indexes = {
+            'users': {
+                'email': HashIndex(lambda u: normalize_email(u.get('email'))),
+                'role': HashIndex(lambda u: u.get('role')),
+                'active': CountIndex(lambda u: u.get('role') if u.get('is_active') else None),
+                'suggest': PrefixIndex(organizer_suggestions),
+                'created': SortedIndex(listed_user_created),
+                'role_created': SortedIndex(listed_user_role_created),
+            },
+            'events': {
+                'organizer_id': HashIndex(lambda e: e.get('organizer_id')),
+                'status': HashIndex(lambda e: e.get('status')),
+                'approved_start': SortedIndex(approved_start),
+                'status_created': SortedIndex(grouped_time('status', 'created_at')),
+                'search': TextIndex(event_search_fields, SEARCH_WEIGHTS),
+                'suggest': PrefixIndex(event_suggestions),
+                **{'facet_' + facet: HashIndex(facet_key(facet)) for facet in EVENT_FACETS},
+                'facets': HashIndex(facet_values),
+            },
+            'registrations': {
+                'user_id': HashIndex(lambda r: r['user_id']),
+                'event_id': HashIndex(lambda r: r['event_id']),
+                'user_event': HashIndex(lambda r: (r['user_id'], r['event_id'])),
+                'event_attended': CountIndex(lambda r: r['event_id'],
+                                             lambda r: 1 if r.get('attended') else 0),
+            },
+            'feedback': {
+                'event_id': HashIndex(lambda f: f['event_id']),
+                'user_event': HashIndex(lambda f: (f['user_id'], f['event_id'])),
+                'event_rating': CountIndex(lambda f: f['event_id'], lambda f: f.get('rating') or 0),
+            },
+            'teams': {
+                'event_id': HashIndex(lambda t: t['event_id']),
+                'team_code': HashIndex(lambda t: t.get('team_code')),
+                'member': HashIndex(lambda t: t['members'], multi=True),
+                'event_member': HashIndex(lambda t: [(t['event_id'], m) for m in t['members']],
+                                          multi=True),
+            },
+            'submissions': {
+                'event_id': HashIndex(lambda s: s['event_id']),
+                'team_event': HashIndex(lambda s: (s['team_id'], s['event_id'])),
+            },
+        }
+
         # Create data directory if it doesn't exist
         os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+        self.storage = create_storage(backend, self.data_file)
 
         # Load existing data or initialize with default admin
         self.load_data()
 
         # Ensure admin user exists
         if 'admin' not in self.users:
-            self.users['admin'] = {
+            self.add_user('admin', {
                 'id': 'admin',
                 'username': 'admin',
                 'email': 'admin@smvec.ac.in',
@@ -60,34 +273,104 @@ class DataStore:
                 'full_name': 'Administrator',
                 'register_number': None,
                 'department': None
-            }
-            self.save_data()
+            })
+
+        if self.lazy and warm_up:
+            threading.Thread(target=self.warm_up, name='datastore-warm-up', daemon=True).start()
+
+        if self.group_commit_ms:
+            self._start_flusher()
+            atexit.register(self.flush)
 
     def load_data(self):
-        """Load data from JSON file"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-                    self.users = convert_datetime_strings(data.get('users', {}))
-                    self.events = convert_datetime_strings(data.get('events', {}))
-                    self.registrations = convert_datetime_strings(data.get('registrations', {}))
-                    self.notifications = convert_datetime_strings(data.get('notifications', {}))
-                    self.feedback = convert_datetime_strings(data.get('feedback', {}))
-                    self.teams = convert_datetime_strings(data.get('teams', {}))
-                    self.submissions = convert_datetime_strings(data.get('submissions', {}))
-                    self.achievements = convert_datetime_strings(data.get('achievements', {}))
-                    self.leaderboards = convert_datetime_strings(data.get('leaderboards', {}))
-            except (json.JSONDecodeError, FileNotFoundError):
-                self.initialize_default_data()
-        else:
+        """Load data from the storage backend"""
+        # Loading creates many long-lived objects and no garbage; pausing the
+        # cyclic GC avoids repeated scans of the growing heap
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self._load_data()
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _load_data(self):
+        try:
+            data = self.storage.load()
+        except FileNotFoundError:
+            data = None
+        except Exception as e:
+            # Never fall back to defaults here: that would overwrite the data
+            # on the next save. Recovery from older generations has failed.
+            print(f"Error loading data from {self.data_file}: {e}")
+            raise
+        if data is None:
             self.initialize_default_data()
+            return
+        with self._lock.write():
+            self._changes = {}
+            if self.lazy:
+                with self._load_lock:
+                    self._raw = {name: data.get(name, {}) for name in COLLECTIONS}
+                    for name in COLLECTIONS:
+                        self.__dict__.pop(name, None)
+                return
+            for name in COLLECTIONS:
+                setattr(self, name, self._decode(name, data.get(name, {})))
+            self.migrate_qr_codes()
+
+    def _decode(self, name, raw):
+        """Build the in-memory records of one collection and index them"""
+        records = {record_id: make_record(name, record) for record_id, record in raw.items()}
+        for index in self.indexes.get(name, {}).values():
+            index.rebuild(records)
+        return records
+
+    def __getattr__(self, name):
+        # Only reached for attributes that are not set, i.e. collections a
+        # lazy store has not materialized yet
+        if name in COLLECTIONS and name in self.__dict__.get('_raw', ()):
+            return self._materialize(name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def _materialize(self, name):
+        with self._load_lock:
+            if name not in self.__dict__:
+                records = self._decode(name, self._raw[name])
+                if name == 'registrations':
+                    # Legacy inline QR images are dropped from memory here
+                    # and from disk by the next save that rewrites the record
+                    for reg in records.values():
+                        reg.pop('qr_code', None)
+                setattr(self, name, records)
+                del self._raw[name]
+        return self.__dict__[name]
+
+    def warm_up(self):
+        """Materialize every collection a lazy store has not loaded yet and
+        build the indexes that defer building to their first use"""
+        for name in COLLECTIONS:
+            getattr(self, name)
+        with self._lock.read():
+            for indexes in self.indexes.values():
+                for index in indexes.values():
+                    build = getattr(index, 'build', None)
+                    if build:
+                        build()
+
+    def migrate_qr_codes(self):
+        """Drop inline base64 QR images from registrations; they are now
+        rendered on demand from the registration's payload"""
+        for reg_id, reg in self.registrations.items():
+            if 'qr_code' in reg:
+                del reg['qr_code']
+                self.touch('registrations', reg_id)
 
     def initialize_default_data(self):
         """Initialize with default data if file not found or corrupted"""
         print("Initializing default data.")
         self.users = {
-            'admin': {
+            'admin': User.from_dict({
                 'id': 'admin',
                 'username': 'admin',
                 'email': 'admin@smvec.ac.in',
@@ -98,7 +381,7 @@ class DataStore:
                 'full_name': 'Administrator',
                 'register_number': None,
                 'department': None
-            }
+            })
         }
         self.events = {}
         self.registrations = {}
@@ -108,79 +391,746 @@ class DataStore:
         self.submissions = {}
         self.achievements = {}
         self.leaderboards = {}
-        self.save_data()
+        self.rebuild_indexes()
+        self.checkpoint()
+
+    def refresh(self):
+        """Apply changes committed to shared storage by other processes"""
+        try:
+            changes = self.storage.poll()
+        except Exception as e:
+            print(f"Error refreshing data: {e}")
+            return
+        if not changes:
+            # The common case, on every request: don't wait for the readers
+            return
+        corrected = False
+        with self._lock.write():
+            for collection, record_id, record in changes:
+                if (collection, record_id) in self._changes:
+                    # Our own unsaved edit wins; the next save merges it
+                    continue
+                with self._load_lock:
+                    raw = self._raw.get(collection)
+                    if raw is not None:
+                        # Not materialized yet: patch the stored form
+                        if record is None:
+                            raw.pop(record_id, None)
+                        else:
+                            raw[record_id] = record
+                        continue
+                records = getattr(self, collection)
+                if record is not None:
+                    record = make_record(collection, record)
+                    if records.get(record_id) == record:
+                        continue
+                counted = self._counted_keys(collection, record_id)
+                self._unindex(collection, record_id)
+                if record is None:
+                    records.pop(record_id, None)
+                else:
+                    records[record_id] = record
+                    self._index(collection, record_id, record)
+
+                # Counter fields were written from the other process's view
+                # of the counted records: recount them from ours, which now
+                # includes both processes' changes
+                if self._update_counter_fields(collection, record_id, counted):
+                    corrected = True
+                if record is not None:
+                    for (counted_collection, name), (parent, _) in COUNTER_FIELDS.items():
+                        if parent == collection and self._sync_counter_field(
+                                counted_collection, name, record_id):
+                            corrected = True
+        if corrected:
+            # Share the recount with the other processes
+            self.save_data()
+
+    def rebuild_indexes(self):
+        """Rebuild every secondary index from the collections"""
+        for collection, indexes in self.indexes.items():
+            for index in indexes.values():
+                index.rebuild(getattr(self, collection))
+
+    def _index(self, collection, record_id, record):
+        for index in self.indexes.get(collection, {}).values():
+            index.add(record_id, record)
+
+    def _unindex(self, collection, record_id):
+        for index in self.indexes.get(collection, {}).values():
+            index.remove(record_id)
+
+    def _get_index(self, collection, index):
+        # Touch the collection first so a lazy store materializes (and
+        # indexes) it
+        getattr(self, collection)
+        return self.indexes[collection][index]
+
+    def read_lock(self):
+        """Context manager holding the shared lock, for consistent multi-step reads"""
+        return self._lock.read()
+
+    def write_lock(self):
+        """Context manager holding the exclusive lock, for read-modify-write
+        sequences such as check-then-register or in-place record edits"""
+        return self._lock.write()
+
+    def records(self, collection):
+        """Return a point-in-time list of a collection's records, safe to
+        iterate while other threads write"""
+        with self._lock.read():
+            return list(getattr(self, collection).values())
+
+    def find(self, collection, index, key):
+        """Return the records of ``collection`` whose ``index`` key is ``key``"""
+        with self._lock.read():
+            records = getattr(self, collection)
+            return [records[record_id] for record_id in self.indexes[collection][index].get(key)
+                    if record_id in records]
+
+    def page(self, collection, index, cursor=None, limit=PAGE_SIZE, reverse=False, prefix=None):
+        """Return a page of ``collection`` in the order of its SortedIndex
+        ``index`` (see SortedIndex.page): up to ``limit`` records following
+        ``cursor``, and the cursor of the next page, None on the last one"""
+        after = decode_cursor(cursor)
+        with self._lock.read():
+            records = getattr(self, collection)
+            sorted_index = self._get_index(collection, index)
+            try:
+                entries = sorted_index.page(after, limit + 1, reverse, prefix)
+            except TypeError:
+                # A cursor whose key does not compare with this index's keys
+                entries = sorted_index.page(None, limit + 1, reverse, prefix)
+            return self._page_of(records, entries, limit)
+
+    @staticmethod
+    def _page_of(records, entries, limit):
+        # ``entries`` runs one past the page when there is a next page
+        if limit is None or len(entries) <= limit:
+            return [records[record_id] for _, record_id in entries], None
+        return ([records[record_id] for _, record_id in entries[:limit]],
+                encode_cursor(entries[limit - 1]))
+
+    def find_one(self, collection, index, key):
+        """Return the first record whose ``index`` key is ``key``, or None"""
+        found = self.find(collection, index, key)
+        return found[0] if found else None
+
+    def get_user_by_email(self, email, role=None):
+        """Return the user with this email (ignoring case), optionally
+        restricted to a role, or None"""
+        for user in self.find('users', 'email', normalize_email(email)):
+            if role is None or user['role'] == role:
+                return user
+        return None
+
+    def count_users(self, role):
+        """Return the number of users with a role"""
+        with self._lock.read():
+            return self._get_index('users', 'role').count(role)
+
+    def get_user_registrations(self, user_id):
+        """Return all registrations made by a user"""
+        return self.find('registrations', 'user_id', user_id)
+
+    def get_event_registrations(self, event_id):
+        """Return all registrations for an event"""
+        return self.find('registrations', 'event_id', event_id)
+
+    def count_event_registrations(self, event_id):
+        """Return the number of registrations for an event"""
+        with self._lock.read():
+            return self._get_index('registrations', 'event_id').count(event_id)
+
+    def event_stats(self, event_id):
+        """Return an event's counters, maintained on every change"""
+        with self._lock.read():
+            registrations = self._get_index('registrations', 'event_id').count(event_id)
+            feedback_count = self._get_index('feedback', 'event_id').count(event_id)
+            rating_sum = self._get_index('feedback', 'event_rating').total(event_id)
+            return {
+                'registrations': registrations,
+                'attended': self._get_index('registrations', 'event_attended').total(event_id),
+                'feedback_count': feedback_count,
+                'rating_sum': rating_sum,
+                'avg_rating': rating_sum / feedback_count if feedback_count else 0,
+                'teams': self._get_index('teams', 'event_id').count(event_id),
+                'submissions': self._get_index('submissions', 'event_id').count(event_id),
+            }
+
+    def counter_totals(self, collection, index):
+        """Return the count (or total) of every key of an index"""
+        with self._lock.read():
+            return self._get_index(collection, index).totals()
+
+    def check_counters(self, repair=False):
+        """Recount every index and counter field from the records and
+        return the mismatches as (collection, index or field, key, stored,
+        actual) tuples. With ``repair`` the indexes are rebuilt and the
+        counter fields rewritten."""
+        problems = []
+        with self._lock.write() if repair else self._lock.read():
+            for collection, indexes in self.indexes.items():
+                records = getattr(self, collection)
+                for name, index in indexes.items():
+                    fresh = index.empty()
+                    fresh.rebuild(records)
+                    stored, actual = index.totals(), fresh.totals()
+                    for key in stored.keys() | actual.keys():
+                        if stored.get(key, 0) != actual.get(key, 0):
+                            problems.append((collection, name, key, stored.get(key, 0),
+                                             actual.get(key, 0)))
+            if repair and problems:
+                self.rebuild_indexes()
+            for (collection, name), (parent, field) in COUNTER_FIELDS.items():
+                index = self.indexes[collection][name]
+                for key, record in getattr(self, parent).items():
+                    if record.get(field, 0) != index.count(key):
+                        problems.append((parent, field, key, record.get(field, 0), index.count(key)))
+                        if repair:
+                            record[field] = index.count(key)
+                            self.touch(parent, key)
+        if repair and problems:
+            self.save_data()
+        return problems
+
+    def get_registration(self, user_id, event_id):
+        """Return a user's registration for an event, or None"""
+        return self.find_one('registrations', 'user_event', (user_id, event_id))
 
+    def get_event_feedback(self, event_id):
+        """Return all feedback left for an event"""
+        return self.find('feedback', 'event_id', event_id)
+
+    def get_feedback(self, user_id, event_id):
+        """Return a user's feedback for an event, or None"""
+        return self.find_one('feedback', 'user_event', (user_id, event_id))
+
+    def get_team_by_code(self, team_code):
+        """Return the active team with this join code, or None"""
+        for team in self.find('teams', 'team_code', team_code):
+            if team['status'] == 'active':
+                return team
+        return None
+
+    def get_user_teams(self, user_id):
+        """Return all teams a user is a member of"""
+        return self.find('teams', 'member', user_id)
+
+    def get_user_team(self, user_id, event_id, active_only=False):
+        """Return the team a user belongs to for an event, or None"""
+        for team in self.find('teams', 'event_member', (event_id, user_id)):
+            if not active_only or team['status'] == 'active':
+                return team
+        return None
+
+    def get_team_submission(self, team_id, event_id):
+        """Return a team's submission for an event, or None"""
+        return self.find_one('submissions', 'team_event', (team_id, event_id))
+
+    def get_organizer_events(self, organizer_id):
+        """Return all events created by an organizer"""
+        return self.find('events', 'organizer_id', organizer_id)
+
+    def upcoming_events(self, limit=None):
+        """Return approved events that have not started yet, soonest first"""
+        with self._lock.read():
+            events = self.events
+            return [events[event_id] for event_id in
+                    self._get_index('events', 'approved_start').after(datetime.now(), limit)]
+
+    def search_events(self, query, limit=None):
+        """Return (event, score) pairs for the approved events matching every
+        word of ``query`` (whole words or word prefixes), most relevant first"""
+        with self._lock.read():
+            events = self.events
+            return [(events[event_id], score) for event_id, score in
+                    self._get_index('events', 'search').search(query, limit)]
+
+    def query_events(self, facets=None, date=None, search=None, organizer=None,
+                     cursor=None, limit=None):
+        """Filter approved events by facet values (see EVENT_FACETS), a date
+        window (see DATE_WINDOWS), a search query and an organizer.
+
+        Each filter is an id set from an index and the sets are intersected
+        smallest first, so every added filter shrinks the work. Returns the
+        matching events, by relevance when searching and by start time
+        otherwise; the facet counts: for every value of every facet and
+        date window, how many events match it together with the other
+        active filters; and the cursor of the next page when ``limit``
+        events were returned from after ``cursor`` and more follow.
+        """
+        with self._lock.read():
+            events = self.events
+            start_index = self._get_index('events', 'approved_start')
+            windows = {window: start_index.between(*date_window(window)) for window in DATE_WINDOWS}
+            filters = {}
+            for facet, value in (facets or {}).items():
+                if value:
+                    filters[facet] = self._get_index('events', 'facet_' + facet).ids(value).keys()
+            if date in DATE_WINDOWS:
+                filters['date'] = set(windows[date])
+            ranked = None
+            if search:
+                ranked = self._get_index('events', 'search').search(search)
+                filters['search'] = dict(ranked).keys()
+            if organizer:
+                # The organizer index also holds unapproved events
+                filters['organizer'] = {
+                    record_id for record_id in self._get_index('events', 'organizer_id').ids(organizer)
+                    if start_index.keys_of(record_id)}
+
+            def intersect(sets):
+                # Ids in all ``sets``, a set or dict key view; None if there
+                # are none. Sets and dict key views intersect in C over the
+                # smaller side.
+                sets = sorted(sets, key=len)
+                if len(sets) < 2:
+                    return sets[0] if sets else None
+                found = set(sets[0])
+                for ids in sets[1:]:
+                    found &= ids
+                return found
+
+            def matching(excluded=None):
+                # Ids passing every filter but ``excluded``
+                return intersect([ids for name, ids in filters.items() if name != excluded])
+
+            # Count facet values per combination of them among the ids the
+            # other filters match: a single walk over those ids, looking up
+            # each one's combination, and none without such filters. Each
+            # facet then leaves its own filter out by summing the
+            # combinations that match the other facets' filters.
+            selected = [(position, facets[facet]) for position, facet in enumerate(EVENT_FACETS)
+                        if facet in filters]
+            index = self._get_index('events', 'facets')
+            base = intersect([ids for name, ids in filters.items() if name not in EVENT_FACETS])
+            combinations = index.totals() if base is None else index.key_counts(base)
+            counts = {}
+            for position, facet in enumerate(EVENT_FACETS):
+                found = counts[facet] = {}
+                for combination, count in combinations.items():
+                    value = combination[position]
+                    if value is None:
+                        continue
+                    if all(combination[other] == chosen for other, chosen in selected
+                           if other != position):
+                        found[value] = found.get(value, 0) + count
+                    else:
+                        found.setdefault(value, 0)
+
+            matched = matching()
+            base = matching('date') if 'date' in filters else matched
+            counts['date'] = {window: len(ids) if base is None else sum(map(base.__contains__, ids))
+                              for window, ids in windows.items()}
+
+            size = None if limit is None else limit + 1
+
+            def ordered(after):
+                # Entries of the page following ``after``, plus one more
+                if ranked is not None:
+                    return seek([(-score, record_id) for record_id, score in ranked
+                                 if record_id in matched], after, size)
+                if matched is None:
+                    return start_index.page(after, size)
+                return start_index.select(matched, after, size)
+
+            try:
+                entries = ordered(decode_cursor(cursor))
+            except TypeError:
+                # A cursor from the other order (searching or not)
+                entries = ordered(None)
+            return self._page_of(events, entries, limit) + (counts,)
+
+    def suggest(self, prefix, limit=10):
+        """Return up to ``limit`` typeahead matches of ``prefix`` among event
+        titles, categories and organizer names, as (kind, text, record)
+        tuples; the record is an event, or the organizer's user"""
+        with self._lock.read():
+            found = []
+            for collection in ('events', 'users'):
+                records = getattr(self, collection)
+                for kind, text, record_id in self._get_index(collection, 'suggest').suggest(
+                        prefix, limit):
+                    found.append((kind, text, records[record_id]))
+        found.sort(key=lambda match: match[1].lower())
+        return found[:limit]
+
+    def events_between(self, start=None, end=None):
+        """Return approved events starting from ``start`` up to, not
+        including, ``end`` in start order; either bound may be None"""
+        with self._lock.read():
+            events = self.events
+            return [events[event_id] for event_id in
+                    self._get_index('events', 'approved_start').between(start, end)]
+
+    def collections(self):
+        """Return all collections keyed by name; collections a lazy store
+        has not materialized are returned in their stored form"""
+        with self._load_lock:
+            return {name: self.__dict__[name] if name in self.__dict__ else self._raw[name]
+                    for name in COLLECTIONS}
 
     def save_data(self):
-        """Save data to JSON file"""
+        """Persist all changes made since the last save. With group commit
+        enabled this only schedules the background flusher."""
+        if self.group_commit_ms:
+            self._dirty.set()
+        else:
+            self.flush()
+
+    @contextmanager
+    def _write_snapshot(self, checkpoint=False):
+        """Take the pending changes and a point-in-time copy of the
+        collections, then hold only _flush_lock while the caller encodes
+        and writes them.
+
+        The copies are shallow, so taking them under the read lock is quick
+        and neither readers nor writers wait for the slow encode. Only the
+        collections the storage's save() reads in full are copied whole; of
+        the others just the changed records are taken, so an incremental
+        save costs no more than its change. A record edited in place
+        meanwhile is marked changed again by touch() and rewritten by the
+        next save. Locks are always taken in the order read lock, then
+        _flush_lock.
+        """
+        self._lock.acquire_read()
+        self._flush_lock.acquire()
         try:
-            data = {
-                'users': self.users,
-                'events': self.events,
-                'registrations': self.registrations,
-                'feedback': self.feedback,
-                'notifications': self.notifications,
-                'teams': self.teams,
-                'submissions': self.submissions,
-                'achievements': self.achievements,
-                'leaderboards': self.leaderboards
-            }
-            with open(self.data_file, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
-            print(f"Data saved to {self.data_file}")
-        except Exception as e:
-            print(f"Error saving data: {e}")
+            try:
+                changes, self._changes = self._changes, {}
+                stored = self.collections()
+                full = None if checkpoint else self.storage.full_collections(changes)
+                if full is None:
+                    full = stored
+                collections = {name: dict(stored[name]) for name in full}
+                for collection, record_id in changes:
+                    if collection not in full:
+                        records = collections.setdefault(collection, {})
+                        if record_id in stored[collection]:
+                            records[record_id] = stored[collection][record_id]
+            finally:
+                self._lock.release_read()
+            yield collections, changes
+        finally:
+            self._flush_lock.release()
+
+    def flush(self):
+        """Persist all pending changes now, regardless of group commit"""
+        txn = self._txn
+        if txn is not None and txn.thread == threading.get_ident():
+            # Inside a transaction: persisted when it commits
+            txn.flush_requested = True
+            return
+        with self._write_snapshot() as (collections, changes):
+            if not changes:
+                return
+            started = time.perf_counter()
+            try:
+                self.storage.save(collections, changes)
+            except Exception as e:
+                print(f"Error saving data: {e}")
+            else:
+                self._record_commit(len(changes), (time.perf_counter() - started) * 1000)
+                print(f"Data saved to {self.data_file}")
+                return
+
+        # Keep the batch pending so the next flush retries it. Under the write
+        # lock, taken only now that _flush_lock is released: a transaction
+        # must not snapshot the pending changes without it, or its rollback
+        # would drop the batch.
+        with self._lock.write():
+            self._changes.update(changes)
+            if self._txn is not None:
+                self._txn.changes.update(changes)
+
+    def _start_flusher(self):
+        self._flusher = threading.Thread(target=self._flush_loop, name='datastore-flusher',
+                                         daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        interval = self.group_commit_ms / 1000
+        while True:
+            self._dirty.wait()
+            # Let further changes accumulate into this batch
+            time.sleep(interval)
+            self._dirty.clear()
+            self.flush()
+
+    def _record_commit(self, batch_size, latency_ms):
+        metrics = self.commit_metrics
+        metrics['commits'] += 1
+        metrics['records'] += batch_size
+        metrics['last_batch_size'] = batch_size
+        metrics['max_batch_size'] = max(metrics['max_batch_size'], batch_size)
+        metrics['last_latency_ms'] = latency_ms
+        metrics['max_latency_ms'] = max(metrics['max_latency_ms'], latency_ms)
+        metrics['total_latency_ms'] += latency_ms
+
+    def get_commit_metrics(self):
+        """Return commit counters plus average batch size and latency"""
+        metrics = dict(self.commit_metrics)
+        commits = metrics['commits']
+        metrics['avg_batch_size'] = metrics['records'] / commits if commits else 0
+        metrics['avg_latency_ms'] = metrics['total_latency_ms'] / commits if commits else 0
+        metrics['pending_records'] = len(self._changes)
+        return metrics
+
+    def prepare_for_fork(self):
+        """Get a pre-fork master's store ready to be shared by its workers.
+
+        Everything is loaded and decoded once here, then moved into the
+        GC's permanent generation so collections in the workers never write
+        to these objects and their pages stay shared copy-on-write.
+        """
+        self.flush()
+        self.warm_up()
+        gc.collect()
+        gc.freeze()
+
+    def after_fork(self):
+        """Reset per-process state in a freshly forked worker. Workers then
+        only pull deltas from shared storage through refresh()."""
+        self._lock = RWLock()
+        self._flush_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._dirty = threading.Event()
+        after_fork = getattr(self.storage, 'after_fork', None)
+        if after_fork:
+            after_fork()
+        if self.group_commit_ms:
+            # The master's flusher thread does not survive the fork
+            self._start_flusher()
+
+    def checkpoint(self):
+        """Write a full snapshot of every collection"""
+        with self._write_snapshot(checkpoint=True) as (collections, _):
+            try:
+                self.storage.checkpoint(collections)
+                print(f"Data saved to {self.data_file}")
+            except Exception as e:
+                print(f"Error saving data: {e}")
+
+    @contextmanager
+    def transaction(self):
+        """Group any number of inserts, updates, deletes and in-place edits
+        into one commit:
+
+            with data_store.transaction():
+                data_store.remove_record('events', event_id)
+                event['status'] = 'cancelled'
+                ...
+
+        The write lock is held for the whole block and saves requested
+        inside it are deferred to a single one when it ends. If the block
+        raises, every record it inserted, replaced, removed or edited is put
+        back as it was and nothing is persisted. A nested transaction joins
+        the outermost one.
+        """
+        with self._lock.write():
+            if self._txn is not None:
+                yield
+                return
+            txn = self._txn = _Transaction(self._changes)
+            set_capture(txn.capture)
+            try:
+                yield
+            except BaseException:
+                set_capture(None)
+                self._rollback(txn)
+                raise
+            finally:
+                set_capture(None)
+                self._txn = None
+        if txn.flush_requested:
+            self.flush()
+        else:
+            self.save_data()
+        for callback in txn.on_commit:
+            callback()
+
+    def after_commit(self, callback):
+        """Call ``callback`` once the current transaction has committed, or
+        right away outside one. Use it for side effects such as emails that
+        must not happen if the transaction rolls back."""
+        txn = self._txn
+        if txn is not None and txn.thread == threading.get_ident():
+            txn.on_commit.append(callback)
+        else:
+            callback()
+
+    def _rollback(self, txn):
+        for record, state in txn.edited.values():
+            record._restore_state(state)
+        for (collection, record_id), record in txn.replaced.items():
+            records = getattr(self, collection)
+            self._unindex(collection, record_id)
+            if record is _ABSENT:
+                records.pop(record_id, None)
+            else:
+                records[record_id] = record
+                self._index(collection, record_id, record)
+        self._changes = txn.changes
+
+    def set_record(self, collection, record_id, data):
+        """Insert or replace a record; persisted by the next save_data()"""
+        with self._lock.write():
+            data = make_record(collection, data)
+            records = getattr(self, collection)
+            if self._txn is not None:
+                self._txn.replace(records, collection, record_id)
+            counted = self._counted_keys(collection, record_id)
+            self._unindex(collection, record_id)
+            records[record_id] = data
+            self._index(collection, record_id, data)
+            self._changes[(collection, record_id)] = True
+            self._update_counter_fields(collection, record_id, counted)
+
+    def remove_record(self, collection, record_id):
+        """Remove a record if present; persisted by the next save_data()"""
+        with self._lock.write():
+            records = getattr(self, collection)
+            if record_id in records:
+                if self._txn is not None:
+                    self._txn.replace(records, collection, record_id)
+                counted = self._counted_keys(collection, record_id)
+                self._unindex(collection, record_id)
+                del records[record_id]
+                self._changes[(collection, record_id)] = True
+                self._update_counter_fields(collection, record_id, counted)
+
+    def touch(self, collection, record_id):
+        """Mark a record that was modified in place as changed"""
+        with self._lock.write():
+            records = getattr(self, collection)
+            record = records.get(record_id)
+            if self._txn is not None:
+                # Re-index the record on rollback
+                self._txn.replace(records, collection, record_id)
+            counted = self._counted_keys(collection, record_id)
+            if record is not None:
+                self._unindex(collection, record_id)
+                self._index(collection, record_id, record)
+            self._changes[(collection, record_id)] = True
+            self._update_counter_fields(collection, record_id, counted)
+
+    def _counted_keys(self, collection, record_id):
+        # The keys a record is counted under by COUNTER_FIELDS, before a change
+        return {name: self.indexes[collection][name].keys_of(record_id)
+                for counted, name in COUNTER_FIELDS if counted == collection}
+
+    def _update_counter_fields(self, collection, record_id, counted):
+        # True if any counter field was rewritten
+        corrected = False
+        for name, before in counted.items():
+            index = self.indexes[collection][name]
+            for key in set(before) | set(index.keys_of(record_id)):
+                corrected = self._sync_counter_field(collection, name, key) or corrected
+        return corrected
+
+    def _sync_counter_field(self, collection, name, key):
+        # Rewrite the counter field of the parent record ``key`` if it
+        # differs from the index count; True if it did
+        parent, field = COUNTER_FIELDS[(collection, name)]
+        record = getattr(self, parent).get(key)
+        count = self._get_index(collection, name).count(key)
+        if record is None or record.get(field, 0) == count:
+            return False
+        record[field] = count
+        self.touch(parent, key)
+        return True
+
+    def add_many(self, collection, records):
+        """Insert or replace many records as one commit; ``records`` maps
+        ids to records"""
+        with self.transaction():
+            for record_id, data in records.items():
+                self.set_record(collection, record_id, data)
+
+    def delete_many(self, collection, record_ids):
+        """Remove many records as one commit"""
+        with self.transaction():
+            for record_id in list(record_ids):
+                self.remove_record(collection, record_id)
+
+    def cascade_delete(self, collection, record_id):
+        """Delete a record together with the records that depend on it (see
+        CASCADES), as one commit. Dependents are found through their indexes,
+        so the cost follows the size of what is deleted, not of the store.
+        Returns the number of records deleted per collection."""
+        deleted = {}
+        with self.transaction():
+            self._cascade(collection, record_id, deleted)
+        return deleted
+
+    def _cascade(self, collection, record_id, deleted):
+        if record_id not in getattr(self, collection):
+            return
+        for dependent, index in CASCADES.get(collection, ()):
+            for dependent_id in self._get_index(dependent, index).get(record_id):
+                self._cascade(dependent, dependent_id, deleted)
+        self.remove_record(collection, record_id)
+        deleted[collection] = deleted.get(collection, 0) + 1
 
     def add_user(self, user_id, user_data):
-        """Add a user and save data"""
-        self.users[user_id] = user_data
-        self.save_data()
+        """Add a user and persist it immediately; account changes bypass
+        group commit"""
+        self.set_record('users', user_id, user_data)
+        self.flush()
 
     def add_event(self, event_id, event_data):
         """Add an event and save data"""
-        self.events[event_id] = event_data
+        self.set_record('events', event_id, event_data)
         self.save_data()
 
     def add_registration(self, reg_id, reg_data):
         """Add a registration and save data"""
-        self.registrations[reg_id] = reg_data
+        self.set_record('registrations', reg_id, reg_data)
         self.save_data()
 
     def add_feedback(self, feedback_id, feedback_data):
         """Add feedback and save data"""
-        self.feedback[feedback_id] = feedback_data
+        self.set_record('feedback', feedback_id, feedback_data)
         self.save_data()
 
     def add_notification(self, notification_id, notification_data):
         """Add notification and save data"""
-        self.notifications[notification_id] = notification_data
+        self.set_record('notifications', notification_id, notification_data)
         self.save_data()
 
-    def update_user(self, user_id, user_data):
-        """Update a user and save data"""
-        self.users[user_id] = user_data
+    def add_team(self, team_id, team_data):
+        """Add a team and save data"""
+        self.set_record('teams', team_id, team_data)
         self.save_data()
 
+    def update_user(self, user_id, user_data):
+        """Update a user and persist it immediately"""
+        self.set_record('users', user_id, user_data)
+        self.flush()
+
     def update_event(self, event_id, event_data):
         """Update an event and save data"""
-        self.events[event_id] = event_data
+        self.set_record('events', event_id, event_data)
         self.save_data()
 
     def delete_user(self, user_id):
-        """Delete a user and save data"""
+        """Delete a user and persist it immediately"""
         if user_id in self.users:
-            del self.users[user_id]
-            self.save_data()
+            self.remove_record('users', user_id)
+            self.flush()
 
     def delete_event(self, event_id):
-        """Delete an event and save data"""
-        if event_id in self.events:
-            del self.events[event_id]
-            self.save_data()
+        """Delete an event with its registrations, feedback, teams and
+        submissions, and save data"""
+        return self.cascade_delete('events', event_id)
+
 
-data_store = DataStore()
+class User(Record):
+    __slots__ = ('id', 'username', 'email', 'password_hash', 'role', 'created_at', 'is_active',
+                 'register_number', 'department', 'full_name', 'organization')
+    datetime_fields = ('created_at',)
 
-class User:
     def __init__(self, username, email, password_hash, role='student', register_number=None, department=None, full_name=None):
         self.id = str(uuid.uuid4())
         self.username = username
@@ -194,7 +1144,19 @@ class User:
         self.department = department
         self.full_name = full_name or username
 
-class Event:
+class Event(Record):
+    __slots__ = ('id', 'title', 'description', 'organizer_id', 'venue', 'start_date', 'end_date',
+                 'category', 'max_attendees', 'current_attendees', 'status', 'created_at',
+                 'image_path', 'is_paid', 'price', 'is_competition', 'team_size_min',
+                 'team_size_max', 'has_prizes', 'prize_pool', 'prizes', 'difficulty_level',
+                 'skills_required', 'registration_deadline', 'submission_deadline',
+                 'result_date', 'eligibility_criteria', 'external_link', 'tags',
+                 'rejection_reason', 'cancelled_at', 'results_announced',
+                 'results_announcement_date')
+    datetime_fields = ('start_date', 'end_date', 'created_at', 'registration_deadline',
+                       'submission_deadline', 'result_date', 'cancelled_at',
+                       'results_announcement_date')
+
     def __init__(self, title, description, organizer_id, venue, start_date, end_date, category, max_attendees=None):
         self.id = str(uuid.uuid4())
         self.title = title
@@ -227,16 +1189,22 @@ class Event:
         self.external_link = ""
         self.tags = []
 
-class Registration:
+class Registration(Record):
+    __slots__ = ('id', 'user_id', 'event_id', 'registered_at', 'attended', 'qr_data')
+    datetime_fields = ('registered_at',)
+
     def __init__(self, user_id, event_id):
         self.id = str(uuid.uuid4())
         self.user_id = user_id
         self.event_id = event_id
         self.registered_at = datetime.now()
         self.attended = False
-        self.qr_code = str(uuid.uuid4())
+        self.qr_data = f"SMVEC_EVENT_{event_id}_{self.id}_{user_id}"
+
+class Feedback(Record):
+    __slots__ = ('id', 'user_id', 'event_id', 'rating', 'comment', 'created_at')
+    datetime_fields = ('created_at',)
 
-class Feedback:
     def __init__(self, user_id, event_id, rating, comment):
         self.id = str(uuid.uuid4())
         self.user_id = user_id
@@ -245,7 +1213,10 @@ class Feedback:
         self.comment = comment
         self.created_at = datetime.now()
 
-class Team:
+class Team(Record):
+    __slots__ = ('id', 'name', 'leader_id', 'event_id', 'members', 'created_at', 'status', 'team_code')
+    datetime_fields = ('created_at',)
+
     def __init__(self, name, leader_id, event_id):
         self.id = str(uuid.uuid4())
         self.name = name
@@ -256,7 +1227,11 @@ class Team:
         self.status = 'active'  # active, disbanded
         self.team_code = str(uuid.uuid4())[:8].upper()
 
-class Submission:
+class Submission(Record):
+    __slots__ = ('id', 'team_id', 'event_id', 'submission_type', 'content', 'description',
+                 'submitted_at', 'status', 'score', 'rank', 'feedback')
+    datetime_fields = ('submitted_at',)
+
     def __init__(self, team_id, event_id, submission_type='link'):
         self.id = str(uuid.uuid4())
         self.team_id = team_id
@@ -269,7 +1244,10 @@ class Submission:
         self.score = 0
         self.rank = 0
 
-class Achievement:
+class Achievement(Record):
+    __slots__ = ('id', 'user_id', 'title', 'description', 'badge_type', 'earned_at', 'event_id')
+    datetime_fields = ('earned_at',)
+
     def __init__(self, user_id, title, description, badge_type='participation'):
         self.id = str(uuid.uuid4())
         self.user_id = user_id
@@ -279,7 +1257,10 @@ class Achievement:
         self.earned_at = datetime.now()
         self.event_id = None
 
-class Notification:
+class Notification(Record):
+    __slots__ = ('id', 'user_id', 'title', 'message', 'type', 'read', 'created_at')
+    datetime_fields = ('created_at',)
+
     def __init__(self, user_id, title, message, notification_type='info'):
         self.id = str(uuid.uuid4())
         self.user_id = user_id
@@ -287,4 +1268,30 @@ class Notification:
         self.message = message
         self.type = notification_type
         self.read = False
-        self.created_at = datetime.now()
\ No newline at end of file
+        self.created_at = datetime.now()
+
+# Record type held by DataStore for each collection; other collections
+# keep plain dicts
+RECORD_TYPES = {
+    'users': User,
+    'events': Event,
+    'registrations': Registration,
+    'feedback': Feedback,
+    'notifications': Notification,
+    'teams': Team,
+    'submissions': Submission,
+    'achievements': Achievement,
+}
+
+def make_record(collection, data):
+    """Return ``data`` as the compact record type of ``collection``"""
+    record_type = RECORD_TYPES.get(collection)
+    if record_type is None or isinstance(data, record_type):
+        return data
+    return record_type.from_dict(data)
+
+# Global data store instance
+data_store = DataStore(backend=os.environ.get('DATASTORE_BACKEND', 'json'),
+                       group_commit_ms=int(os.environ.get('DATASTORE_GROUP_COMMIT_MS', 0)),
+                       lazy=os.environ.get('DATASTORE_LAZY', '').lower() in ('1', 'true', 'yes'),
+                       warm_up=os.environ.get('DATASTORE_WARMUP', '').lower() in ('1', 'true', 'yes'))
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from models import data_store, Event, User
-from utils import login_required, send_notification
+from models import data_store, Event, User, sort_time
+from utils import login_required, send_notifications
+from pagination import page_args, paginate
 from werkzeug.security import generate_password_hash
 from werkzeug.utils import secure_filename
 from datetime import datetime
@@ -16,14 +17,12 @@ def dashboard():
     
     # Get organizer's events
     organizer_events = []
-    for event_id, event in data_store.events.items():
-        if event['organizer_id'] == user_id:
-            # Count registrations for this event
-            registrations = sum(1 for reg in data_store.registrations.values() 
-                              if reg['event_id'] == event_id)
-            event_with_stats = event.copy()
-            event_with_stats['registrations'] = registrations
-            organizer_events.append(event_with_stats)
+    for event in data_store.get_organizer_events(user_id):
+        # Count registrations for this event
+        registrations = data_store.count_event_registrations(event['id'])
+        event_with_stats = event.copy()
+        event_with_stats['registrations'] = registrations
+        organizer_events.append(event_with_stats)
     
     # Sort by created date
     organizer_events.sort(key=lambda x: x['created_at'], reverse=True)
@@ -140,29 +139,37 @@ def create_event():
 @login_required('organizer')
 def manage_events():
     user_id = session['user_id']
+    cursor, per_page = page_args(request.args)
     
-    # Get organizer's events with registration stats
+    # One page of the organizer's events, newest first, with registrations
+    events = data_store.get_organizer_events(user_id)
+    page_events, next_cursor = paginate(
+        events, lambda event: sort_time(event.get('created_at')), cursor, per_page, reverse=True)
     organizer_events = []
-    for event_id, event in data_store.events.items():
-        if event['organizer_id'] == user_id:
-            # Count registrations
-            registrations = []
-            for reg_id, reg in data_store.registrations.items():
-                if reg['event_id'] == event_id:
-                    user = data_store.users.get(reg['user_id'], {})
-                    registrations.append({
-                        'registration': reg,
-                        'user': user
-                    })
-            
-            event_with_regs = event.copy()
-            event_with_regs['registrations'] = registrations
-            organizer_events.append(event_with_regs)
-    
-    # Sort by created date
-    organizer_events.sort(key=lambda x: x['created_at'], reverse=True)
-    
-    return render_template('organizer/manage_events.html', events=organizer_events)
+    for event in page_events:
+        # Count registrations
+        registrations = []
+        for reg in data_store.get_event_registrations(event['id']):
+            user = data_store.users.get(reg['user_id'], {})
+            registrations.append({
+                'registration': reg,
+                'user': user
+            })
+        
+        event_with_regs = event.copy()
+        event_with_regs['registrations'] = registrations
+        organizer_events.append(event_with_regs)
+    
+    # Summary over all of the organizer's events, from the index counts
+    summary = {'total': 0, 'approved': 0, 'pending': 0, 'registrations': 0}
+    for event in events:
+        summary['total'] += 1
+        if event['status'] in ('approved', 'pending'):
+            summary[event['status']] += 1
+        summary['registrations'] += data_store.count_event_registrations(event['id'])
+    
+    return render_template('organizer/manage_events.html', events=organizer_events,
+                           next_cursor=next_cursor, summary=summary)
 
 @organizer_bp.route('/event-analytics/<event_id>')
 @login_required('organizer')
@@ -174,35 +181,30 @@ def event_analytics(event_id):
     
     # Get registrations with user details
     registrations = []
-    for reg_id, reg in data_store.registrations.items():
-        if reg['event_id'] == event_id:
-            user = data_store.users.get(reg['user_id'], {})
-            registrations.append({
-                'registration': reg,
-                'user': user
-            })
+    for reg in data_store.get_event_registrations(event_id):
+        user = data_store.users.get(reg['user_id'], {})
+        registrations.append({
+            'registration': reg,
+            'user': user
+        })
     
     # Get feedback for this event
     event_feedback = []
-    total_rating = 0
-    for fb_id, fb in data_store.feedback.items():
-        if fb['event_id'] == event_id:
-            user = data_store.users.get(fb['user_id'], {})
-            event_feedback.append({
-                'feedback': fb,
-                'user': user
-            })
-            total_rating += fb['rating']
-    
-    avg_rating = total_rating / len(event_feedback) if event_feedback else 0
-    
-    # Calculate statistics
+    for fb in data_store.get_event_feedback(event_id):
+        user = data_store.users.get(fb['user_id'], {})
+        event_feedback.append({
+            'feedback': fb,
+            'user': user
+        })
+    
+    # Statistics from the data store's per-event counters
+    counters = data_store.event_stats(event_id)
     stats = {
-        'total_registrations': len(registrations),
-        'attended': len([r for r in registrations if r['registration']['attended']]),
-        'feedback_count': len(event_feedback),
-        'avg_rating': round(avg_rating, 2),
-        'attendance_rate': round((len([r for r in registrations if r['registration']['attended']]) / len(registrations) * 100) if registrations else 0, 2)
+        'total_registrations': counters['registrations'],
+        'attended': counters['attended'],
+        'feedback_count': counters['feedback_count'],
+        'avg_rating': round(counters['avg_rating'], 2),
+        'attendance_rate': round((counters['attended'] / counters['registrations'] * 100) if counters['registrations'] else 0, 2)
     }
     
     return render_template('organizer/event_analytics.html',
@@ -219,17 +221,24 @@ def mark_attendance(event_id, reg_id):
         flash('Unauthorized action', 'error')
         return redirect(url_for('organizer.manage_events'))
     
-    registration = data_store.registrations.get(reg_id)
-    if registration and registration['event_id'] == event_id:
-        registration['attended'] = not registration['attended']
-        data_store.save_data()  # Save after updating attendance
-        status = 'marked as attended' if registration['attended'] else 'marked as not attended'
-        flash(f'Participant {status}', 'success')
-    else:
-        flash('Registration not found', 'error')
+    with data_store.write_lock():
+        registration = data_store.registrations.get(reg_id)
+        if registration and registration['event_id'] == event_id:
+            registration['attended'] = not registration['attended']
+            data_store.touch('registrations', reg_id)
+            data_store.save_data()  # Save after updating attendance
+            status = 'marked as attended' if registration['attended'] else 'marked as not attended'
+            flash(f'Participant {status}', 'success')
+        else:
+            flash('Registration not found', 'error')
     
     return redirect(url_for('organizer.event_analytics', event_id=event_id))
 
+def _registered_user_ids(event_id):
+    """Return the ids of the existing users registered for an event"""
+    return [reg['user_id'] for reg in data_store.find('registrations', 'event_id', event_id)
+            if reg['user_id'] in data_store.users]
+
 @organizer_bp.route('/delete-event/<event_id>', methods=['POST'])
 @login_required('organizer')
 def delete_event(event_id):
@@ -242,35 +251,9 @@ def delete_event(event_id):
         flash('Cannot delete event with registered participants. Use Cancel or Force Delete options.', 'error')
         return redirect(url_for('organizer.manage_events'))
     
-    # Delete event and related data
+    # Delete the event and everything that belongs to it as one commit
     data_store.delete_event(event_id)
     
-    # Delete registrations
-    regs_to_delete = [reg_id for reg_id, reg in data_store.registrations.items() 
-                      if reg['event_id'] == event_id]
-    for reg_id in regs_to_delete:
-        del data_store.registrations[reg_id]
-    
-    # Delete feedback
-    feedback_to_delete = [fb_id for fb_id, fb in data_store.feedback.items() 
-                         if fb['event_id'] == event_id]
-    for fb_id in feedback_to_delete:
-        del data_store.feedback[fb_id]
-    
-    # Delete teams and submissions for this event
-    teams_to_delete = [team_id for team_id, team in data_store.teams.items() 
-                      if team['event_id'] == event_id]
-    for team_id in teams_to_delete:
-        del data_store.teams[team_id]
-    
-    submissions_to_delete = [sub_id for sub_id, sub in data_store.submissions.items() 
-                           if sub['event_id'] == event_id]
-    for sub_id in submissions_to_delete:
-        del data_store.submissions[sub_id]
-    
-    # Save data after deletions
-    data_store.save_data()
-    
     flash('Event deleted successfully', 'success')
     return redirect(url_for('organizer.manage_events'))
 
@@ -282,21 +265,16 @@ def cancel_event(event_id):
         flash('Unauthorized action', 'error')
         return redirect(url_for('organizer.manage_events'))
     
-    # Update event status to cancelled
-    event['status'] = 'cancelled'
-    event['cancelled_at'] = datetime.now()
+    with data_store.transaction():
+        # Update event status to cancelled
+        event['status'] = 'cancelled'
+        event['cancelled_at'] = datetime.now()
+        data_store.touch('events', event_id)
     
-    # Notify all registered participants
-    registered_users = []
-    for reg in data_store.registrations.values():
-        if reg['event_id'] == event_id:
-            user = data_store.users.get(reg['user_id'])
-            if user:
-                registered_users.append(user)
-                send_notification(user['id'], 'Event Cancelled', 
-                                f'The event "{event["title"]}" has been cancelled by the organizer.')
-    
-    data_store.save_data()
+        # Notify all registered participants
+        registered_users = _registered_user_ids(event_id)
+        send_notifications(registered_users, 'Event Cancelled', 
+                           f'The event "{event["title"]}" has been cancelled by the organizer.')
     
     flash(f'Event cancelled successfully. {len(registered_users)} participants have been notified.', 'warning')
     return redirect(url_for('organizer.manage_events'))
@@ -309,48 +287,14 @@ def force_delete_event(event_id):
         flash('Unauthorized action', 'error')
         return redirect(url_for('organizer.manage_events'))
     
-    # Count affected participants
-    registered_count = len([reg for reg in data_store.registrations.values() 
-                           if reg['event_id'] == event_id])
-    
-    # Notify all registered participants before deletion
-    for reg in data_store.registrations.values():
-        if reg['event_id'] == event_id:
-            user = data_store.users.get(reg['user_id'])
-            if user:
-                send_notification(user['id'], 'Event Deleted', 
-                                f'The event "{event["title"]}" has been permanently deleted by the organizer.')
-    
-    # Delete event and all related data
-    data_store.delete_event(event_id)
+    # Notify participants and delete the event and its data as one commit
+    with data_store.transaction():
+        registered_users = _registered_user_ids(event_id)
+        send_notifications(registered_users, 'Event Deleted', 
+                           f'The event "{event["title"]}" has been permanently deleted by the organizer.')
+        data_store.delete_event(event_id)
     
-    # Delete registrations
-    regs_to_delete = [reg_id for reg_id, reg in data_store.registrations.items() 
-                      if reg['event_id'] == event_id]
-    for reg_id in regs_to_delete:
-        del data_store.registrations[reg_id]
-    
-    # Delete feedback
-    feedback_to_delete = [fb_id for fb_id, fb in data_store.feedback.items() 
-                         if fb['event_id'] == event_id]
-    for fb_id in feedback_to_delete:
-        del data_store.feedback[fb_id]
-    
-    # Delete teams and submissions for this event
-    teams_to_delete = [team_id for team_id, team in data_store.teams.items() 
-                      if team['event_id'] == event_id]
-    for team_id in teams_to_delete:
-        del data_store.teams[team_id]
-    
-    submissions_to_delete = [sub_id for sub_id, sub in data_store.submissions.items() 
-                           if sub['event_id'] == event_id]
-    for sub_id in submissions_to_delete:
-        del data_store.submissions[sub_id]
-    
-    # Save data after deletions
-    data_store.save_data()
-    
-    flash(f'Event permanently deleted. {registered_count} participants were notified.', 'success')
+    flash(f'Event permanently deleted. {len(registered_users)} participants were notified.', 'success')
     return redirect(url_for('organizer.manage_events'))
 
 @organizer_bp.route('/team-submissions/<event_id>')
@@ -367,22 +311,21 @@ def team_submissions(event_id):
     
     # Get all submissions for this event
     event_submissions = []
-    for submission in data_store.submissions.values():
-        if submission['event_id'] == event_id:
-            team = data_store.teams.get(submission['team_id'])
-            if team:
-                # Get team members
-                team_members = []
-                for member_id in team['members']:
-                    member = data_store.users.get(member_id)
-                    if member:
-                        team_members.append(member)
-                
-                event_submissions.append({
-                    'submission': submission,
-                    'team': team,
-                    'team_members': team_members
-                })
+    for submission in data_store.find('submissions', 'event_id', event_id):
+        team = data_store.teams.get(submission['team_id'])
+        if team:
+            # Get team members
+            team_members = []
+            for member_id in team['members']:
+                member = data_store.users.get(member_id)
+                if member:
+                    team_members.append(member)
+            
+            event_submissions.append({
+                'submission': submission,
+                'team': team,
+                'team_members': team_members
+            })
     
     # Sort by submission date
     event_submissions.sort(key=lambda x: x['submission']['submitted_at'], reverse=True)
@@ -408,20 +351,21 @@ def evaluate_submission(submission_id):
         score = float(request.form['score'])
         feedback = request.form.get('feedback', '')
         
-        # Update submission
-        submission['score'] = score
-        submission['status'] = 'evaluated'
-        submission['feedback'] = feedback
-        
-        # Calculate ranks for all evaluated submissions in this event
-        event_submissions = [s for s in data_store.submissions.values() 
-                           if s['event_id'] == submission['event_id'] and s['status'] == 'evaluated']
-        event_submissions.sort(key=lambda x: x['score'], reverse=True)
+        with data_store.transaction():
+            # Update submission
+            submission['score'] = score
+            submission['status'] = 'evaluated'
+            submission['feedback'] = feedback
         
-        for i, sub in enumerate(event_submissions):
-            sub['rank'] = i + 1
+            # Calculate ranks for all evaluated submissions in this event
+            event_submissions = [s for s in data_store.find('submissions', 'event_id',
+                                                            submission['event_id'])
+                                 if s['status'] == 'evaluated']
+            event_submissions.sort(key=lambda x: x['score'], reverse=True)
         
-        data_store.save_data()
+            for i, sub in enumerate(event_submissions):
+                sub['rank'] = i + 1
+                data_store.touch('submissions', sub['id'])
         
         flash('Submission evaluated successfully!', 'success')
         return redirect(url_for('organizer.team_submissions', event_id=submission['event_id']))
@@ -449,9 +393,11 @@ def announce_results(event_id):
         return redirect(url_for('organizer.manage_events'))
     
     if request.method == 'POST':
-        # Mark results as announced
-        event['results_announced'] = True
-        event['results_announcement_date'] = datetime.now()
+        with data_store.write_lock():
+            # Mark results as announced
+            event['results_announced'] = True
+            event['results_announcement_date'] = datetime.now()
+            data_store.touch('events', event_id)
         data_store.save_data()
         
         flash('Results announced successfully!', 'success')
@@ -459,8 +405,8 @@ def announce_results(event_id):
     
     # Get evaluated submissions
     evaluated_submissions = []
-    for submission in data_store.submissions.values():
-        if submission['event_id'] == event_id and submission['status'] == 'evaluated':
+    for submission in data_store.find('submissions', 'event_id', event_id):
+        if submission['status'] == 'evaluated':
             team = data_store.teams.get(submission['team_id'])
             if team:
                 evaluated_submissions.append({
@@ -489,24 +435,25 @@ def register_organizer():
             flash('Passwords do not match', 'error')
             return render_template('organizer/register_organizer.html')
         
-        # Check if email already exists
-        for uid, user in data_store.users.items():
-            if user['email'] == email:
-                flash('Email already registered', 'error')
-                return render_template('organizer/register_organizer.html')
-        
         # Create new organizer
         user = User(username, email, generate_password_hash(password), 'organizer')
-        data_store.users[user.id] = {
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'password_hash': user.password_hash,
-            'role': user.role,
-            'created_at': user.created_at,
-            'is_active': user.is_active,
-            'department': department
-        }
+
+        # Check and insert under the lock, so concurrent sign-ups can't
+        # both claim the email
+        with data_store.write_lock():
+            if data_store.get_user_by_email(email):
+                flash('Email already registered', 'error')
+                return render_template('organizer/register_organizer.html')
+            data_store.add_user(user.id, {
+                'id': user.id,
+                'username': user.username,
+                'email': user.email,
+                'password_hash': user.password_hash,
+                'role': user.role,
+                'created_at': user.created_at,
+                'is_active': user.is_active,
+                'department': department
+            })
         
         flash('Organizer registration successful! Please login.', 'success')
         return redirect(url_for('auth.organizer_login'))
@@ -0,0 +1,93 @@
+"""Keyset (cursor) pagination for record listings.
+
+A page is read from a SortedIndex (see DataStore.page), starting after the
+(key, record_id) entry of the last record on the previous page. The cursor
+is that entry, encoded for a URL. Seeking to it is a bisection, so every
+page costs the same however many records come before it, and records added
+or deleted between requests do not shift later pages the way an offset
+would. Short per-user lists are paged the same way in memory (paginate()).
+"""
+import base64
+import binascii
+import heapq
+import os
+from datetime import datetime
+
+import codec
+from codec import parse_datetime
+
+PAGE_SIZE = int(os.environ.get('PAGE_SIZE', 20))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 100))
+
+
+def _tag(value):
+    # JSON has no datetime or tuple type; tag datetimes so they decode as
+    # datetimes again, and let tuples become lists
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, tuple):
+        return [_tag(item) for item in value]
+    return value
+
+
+def _untag(value):
+    if isinstance(value, dict):
+        return parse_datetime(value.get('dt'))
+    if isinstance(value, list):
+        return tuple(_untag(item) for item in value)
+    return value
+
+
+def encode_cursor(entry):
+    """Return the URL-safe cursor of an index entry, a (key, record_id) pair"""
+    text = codec.dumps(_tag(entry))
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the index entry of a cursor, or None for a missing or
+    malformed cursor (the listing then starts from its first page)"""
+    if not cursor:
+        return None
+    try:
+        text = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        entry = _untag(codec.loads(text))
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(entry, tuple) or len(entry) != 2 or not isinstance(entry[1], str):
+        return None
+    return entry
+
+
+def page_args(args):
+    """Return the cursor and page size requested in query ``args``
+    (``cursor`` and ``per_page``), the size clamped to MAX_PAGE_SIZE"""
+    try:
+        limit = int(args.get('per_page', PAGE_SIZE))
+    except (TypeError, ValueError):
+        limit = PAGE_SIZE
+    return args.get('cursor') or None, max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def paginate(records, sort_key, cursor=None, limit=PAGE_SIZE, reverse=False):
+    """Return a page of ``records`` in ``sort_key`` order (ties by id, all
+    reversed with ``reverse``): up to ``limit`` records following ``cursor``,
+    and the cursor of the next page, None on the last one.
+
+    For short lists with no SortedIndex of their own, such as one user's
+    registrations: their length does not grow with the data store.
+    """
+    after = decode_cursor(cursor)
+    by_id = {record['id']: record for record in records}
+    entries = [(sort_key(record), record_id) for record_id, record in by_id.items()]
+    try:
+        if after is not None:
+            entries = [entry for entry in entries if (entry < after if reverse else entry > after)]
+        top = heapq.nlargest if reverse else heapq.nsmallest
+        entries = top(limit + 1, entries)
+    except TypeError:
+        # A cursor from another listing
+        return paginate(records, sort_key, None, limit, reverse)
+    if len(entries) <= limit:
+        return [by_id[record_id] for _, record_id in entries], None
+    return [by_id[record_id] for _, record_id in entries[:limit]], encode_cursor(entries[limit - 1])
@@ -0,0 +1,134 @@
+import base64
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+# Rendering parameters are part of the cache key, so changing them
+# naturally invalidates previously cached images.
+QR_RENDER_VERSION = 'v1-L-10-4'
+QR_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'qr_cache')
+
+# Served in place of QR codes when the qrcode library is not installed: a
+# blank 1x1 image, never cached under a payload's key
+FALLBACK_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==")
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+def render_qr_png(text):
+    """Render a QR code for event check-in as PNG bytes"""
+    try:
+        import qrcode
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_L,
+            box_size=10,
+            border=4,
+        )
+        qr.add_data(text)
+        qr.make(fit=True)
+
+        img = qr.make_image(fill_color="black", back_color="white")
+
+        buffered = io.BytesIO()
+        img.save(buffered, format="PNG")
+        return buffered.getvalue()
+    except ImportError:
+        # Fallback if qrcode library is not available
+        return FALLBACK_PNG
+
+def qr_cache_key(text):
+    """Content address of the QR image for ``text``; also used as its ETag"""
+    return hashlib.sha256(f"{QR_RENDER_VERSION}:{text}".encode()).hexdigest()
+
+def _cache_path(text):
+    return os.path.join(QR_CACHE_DIR, qr_cache_key(text) + '.png')
+
+def _read_cached_png(text):
+    try:
+        with open(_cache_path(text), 'rb') as f:
+            png = f.read()
+    except FileNotFoundError:
+        return None
+    # Earlier versions cached the fallback image; render those again
+    return None if png == FALLBACK_PNG else png
+
+def _write_cached_png(text, png):
+    path = _cache_path(text)
+    try:
+        os.makedirs(QR_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Failed to cache QR code: {e}")
+
+class _NotRendered(Exception):
+    """Raised instead of returning FALLBACK_PNG, which lru_cache would keep"""
+
+@lru_cache(maxsize=512)
+def _cached_qr_png(text):
+    png = _read_cached_png(text)
+    if png is None:
+        png = render_qr_png(text)
+        if png == FALLBACK_PNG:
+            raise _NotRendered
+        _write_cached_png(text, png)
+    return png
+
+def get_qr_png(text):
+    """Return the QR PNG for ``text`` from the memory or disk cache,
+    rendering and caching it on a miss. Without the qrcode library this is
+    FALLBACK_PNG, which is not cached."""
+    try:
+        return _cached_qr_png(text)
+    except _NotRendered:
+        return FALLBACK_PNG
+
+def _get_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            workers = int(os.environ.get('QR_RENDER_WORKERS', min(4, os.cpu_count() or 1)))
+            _render_pool = ProcessPoolExecutor(max_workers=workers)
+        return _render_pool
+
+def render_qr_batch(texts):
+    """Render QR codes for many payloads at once, spreading the PNG encoding
+    over a process pool. Results land in the disk cache and are returned as
+    {payload: png}."""
+    results = {}
+    missing = []
+    for text in dict.fromkeys(texts):
+        png = _read_cached_png(text)
+        if png is None:
+            missing.append(text)
+        else:
+            results[text] = png
+
+    if len(missing) > 1:
+        try:
+            pngs = list(_get_render_pool().map(render_qr_png, missing))
+        except Exception as e:
+            print(f"QR render pool unavailable, rendering inline: {e}")
+            pngs = [render_qr_png(text) for text in missing]
+    else:
+        pngs = [render_qr_png(text) for text in missing]
+
+    for text, png in zip(missing, pngs):
+        if png != FALLBACK_PNG:
+            _write_cached_png(text, png)
+        results[text] = png
+    return results
+
+def prerender_qr_codes(texts):
+    """Warm the QR cache for ``texts`` in the background so the request that
+    created them doesn't wait on rendering"""
+    texts = list(texts)
+    if texts:
+        threading.Thread(target=render_qr_batch, args=(texts,), daemon=True).start()
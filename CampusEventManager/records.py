@@ -0,0 +1,251 @@
+import copy
+import sys
+from collections.abc import Mapping, MutableMapping
+
+from codec import parse_datetime
+
+# Fields whose values repeat across many records. Interning them makes
+# every record share one string object per distinct value.
+INTERNED_FIELDS = frozenset(('role', 'status', 'category', 'difficulty_level', 'type',
+                             'badge_type', 'submission_type', 'department'))
+
+# Called with a record before it is edited while a DataStore transaction is
+# open, so the transaction can restore it on rollback (see set_capture)
+_capture = None
+
+
+def set_capture(hook):
+    """Install (or with None, remove) the pre-edit hook for records"""
+    global _capture
+    _capture = hook
+
+
+class Record:
+    """Compact record stored in ``__slots__`` that behaves like the dict it
+    replaces: ``record['title']``, ``record.get()``, ``in``, iteration and
+    item assignment all work, so routes and templates need no changes.
+    Keys outside the declared slots go to a small overflow dict.
+
+    Subclasses list their datetime fields in ``datetime_fields``; ISO strings
+    assigned to them are decoded on the way in, so in memory those fields
+    always hold datetimes whether the record came from storage or a route.
+    """
+
+    __slots__ = ('_extra',)
+    _fields = ()
+    _field_set = frozenset()
+    _datetime_field_set = frozenset()
+    datetime_fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = []
+        for klass in reversed(cls.__mro__):
+            fields.extend(slot for slot in klass.__dict__.get('__slots__', ()) if slot != '_extra')
+        cls._fields = tuple(fields)
+        cls._field_set = frozenset(fields)
+        cls._datetime_field_set = frozenset(cls.datetime_fields)
+
+    def __new__(cls, *args, **kwargs):
+        self = super().__new__(cls)
+        self._extra = None
+        return self
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a plain dict (e.g. one loaded from storage)"""
+        # Same rules as __setitem__, inlined: this is the load hot path
+        record = object.__new__(cls)
+        fields = cls._field_set
+        datetime_fields = cls._datetime_field_set
+        extra = None
+        for key, value in data.items():
+            if key in datetime_fields:
+                value = parse_datetime(value)
+            elif key in INTERNED_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            if key in fields:
+                setattr(record, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        record._extra = extra
+        return record
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            try:
+                value = getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            value = self._extra[key]
+        else:
+            raise KeyError(key)
+        if _capture is not None and isinstance(value, (list, dict)):
+            # The caller may edit the value in place, e.g. team['members']
+            _capture(self)
+        return value
+
+    def __setitem__(self, key, value):
+        if _capture is not None:
+            _capture(self)
+        if key in self._datetime_field_set:
+            value = parse_datetime(value)
+        elif key in INTERNED_FIELDS and type(value) is str:
+            value = sys.intern(value)
+        if key in self._field_set:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if _capture is not None:
+            _capture(self)
+        if key in self._field_set:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self._field_set:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        for field in self._fields:
+            if hasattr(self, field):
+                yield field
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, Mapping)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def update(self, other=(), **kwargs):
+        for key, value in dict(other, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    _MISSING = object()
+
+    def pop(self, key, default=_MISSING):
+        try:
+            value = self[key]
+        except KeyError:
+            if default is Record._MISSING:
+                raise
+            return default
+        del self[key]
+        return value
+
+    def to_dict(self):
+        """Return the record as a plain dict"""
+        return {key: self[key] for key in self}
+
+    copy = to_dict
+
+    def _save_state(self):
+        """Return a copy of the record's contents for _restore_state()"""
+        # Read the slots directly: item access would call the capture hook
+        state = {field: getattr(self, field) for field in self._fields if hasattr(self, field)}
+        if self._extra:
+            state.update(self._extra)
+        for key, value in state.items():
+            if isinstance(value, (list, dict)):
+                state[key] = copy.copy(value)
+        return state
+
+    def _restore_state(self, state):
+        for field in self._fields:
+            if field in state:
+                setattr(self, field, state[field])
+            elif hasattr(self, field):
+                delattr(self, field)
+        extra = {key: value for key, value in state.items() if key not in self._field_set}
+        self._extra = extra or None
+
+
+MutableMapping.register(Record)
+
+
+def benchmark(count=100000):
+    """Measure the memory held by ``count`` synthetic registrations as plain
+    dicts and as compact records, both decoded from the same JSON"""
+    import gc
+    import tracemalloc
+    from datetime import datetime, timedelta
+
+    import codec
+    from models import make_record
+
+    started = datetime(2026, 1, 1)
+    lines = []
+    for i in range(count):
+        user_id, event_id = f'u{i % 2000}', f'e{i % 200}'
+        lines.append(codec.dumps({
+            'id': f'r{i}', 'user_id': user_id, 'event_id': event_id,
+            'registered_at': started + timedelta(seconds=i), 'attended': False,
+            'qr_data': f'SMVEC_EVENT_{event_id}_r{i}_{user_id}'}))
+
+    def measure(build):
+        gc.collect()
+        tracemalloc.start()
+        records = {}
+        for line in lines:
+            record = build(codec.loads(line))
+            records[record['id']] = record
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return size
+
+    def as_dict(data):
+        data['registered_at'] = parse_datetime(data['registered_at'])
+        return data
+
+    for label, build in (('dict records', as_dict),
+                         ('slot records', lambda data: make_record('registrations', data))):
+        size = measure(build)
+        print(f"{label}: {size / count * 100000 / 1e6:.1f} MB per 100k registrations "
+              f"({size / count:.0f} B each)")
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
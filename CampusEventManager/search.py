@@ -0,0 +1,375 @@
+"""Full-text search: an inverted index with prefix matching and BM25
+ranking, and a sorted prefix array for typeahead suggestions.
+
+The data store keeps a TextIndex over approved events and PrefixIndexes of
+event titles, categories and organizer names up to date like its other
+indexes. Run as a script to benchmark them on synthetic events:
+
+    python search.py [EVENTS]
+"""
+import heapq
+import math
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from operator import itemgetter
+
+TOKEN_RE = re.compile(r'\w+')
+
+# BM25 parameters: term frequency saturation and length normalization
+K1 = 1.2
+B = 0.75
+
+# Weight of terms matched by prefix relative to exact matches
+PREFIX_WEIGHT = 0.5
+
+
+def tokenize(value):
+    """Return the lowercase word tokens of a string or list of strings"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return TOKEN_RE.findall(value.lower())
+    tokens = []
+    for item in value:
+        tokens.extend(tokenize(item))
+    return tokens
+
+
+class TextIndex:
+    """Inverted index from terms to the records containing them.
+
+    ``fields_func`` returns a record's searchable fields as a mapping of
+    field name to text (a string or a list of strings), or None to leave
+    the record out. ``weights`` scales the term frequencies of each field,
+    so e.g. a title match outranks a description match.
+
+    A query matches records containing every query token, either as a whole
+    term or as the prefix of one; results are ranked by BM25.
+
+    Tokenizing every record is slow, so rebuild() only remembers the
+    collection and the index is built on first use, or by build(). Callers
+    must keep writers out meanwhile, as the data store's locks do.
+    """
+
+    def __init__(self, fields_func, weights=None):
+        self.fields_func = fields_func
+        self.weights = weights or {}
+        self._postings = {}   # term -> {record_id: weighted term frequency}
+        self._documents = {}  # record_id -> terms of the record
+        self._lengths = {}    # record_id -> weighted length
+        self._total_length = 0.0
+        self._terms = []      # every term, sorted, for prefix lookups
+        self._pending = None  # collection to index on first use
+        self._build_lock = threading.Lock()
+
+    def _term_frequencies(self, record):
+        fields = self.fields_func(record)
+        if fields is None:
+            return None
+        frequencies = {}
+        for field, value in fields.items():
+            weight = self.weights.get(field, 1.0)
+            for token in tokenize(value):
+                frequencies[token] = frequencies.get(token, 0.0) + weight
+        return frequencies
+
+    def add(self, record_id, record):
+        """Index the current text of ``record``"""
+        if self._pending is not None:
+            # Picked up from the collection when the index is built
+            return
+        frequencies = self._term_frequencies(record)
+        if frequencies is None:
+            return
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[record_id] = frequency
+        self._documents[record_id] = list(frequencies)
+        length = sum(frequencies.values())
+        self._lengths[record_id] = length
+        self._total_length += length
+
+    def remove(self, record_id):
+        """Drop ``record_id`` from the postings of the terms it was indexed under"""
+        if self._pending is not None:
+            return
+        terms = self._documents.pop(record_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[record_id]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+        self._total_length -= self._lengths.pop(record_id)
+
+    def _expand(self, token):
+        # The token itself plus every longer term it is a prefix of
+        i = bisect_left(self._terms, token)
+        terms = self._terms
+        while i < len(terms) and terms[i].startswith(token):
+            yield terms[i]
+            i += 1
+
+    def search(self, query, limit=None):
+        """Return (record_id, score) pairs for the records matching every
+        token of ``query``, best first"""
+        self.build()
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or not self._documents:
+            return []
+        count = len(self._documents)
+        lengths = self._lengths
+        # BM25 length normalization, K1 * (1 - B + B * length / average),
+        # as c1 + c2 * length
+        c1 = K1 * (1 - B)
+        c2 = K1 * B * count / (self._total_length or 1.0)
+
+        # Rarest token first, so later tokens only score the records that
+        # are still in the running
+        expanded = [(token, [(term, self._postings[term]) for term in self._expand(token)])
+                    for token in tokens]
+        expanded.sort(key=lambda item: sum(len(postings) for _, postings in item[1]))
+
+        scores = None
+        for token, terms in expanded:
+            token_scores = {}
+            for term, postings in terms:
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                weight = idf * (K1 + 1) * (1.0 if term == token else PREFIX_WEIGHT)
+                if scores is not None:
+                    postings = {record_id: postings[record_id]
+                                for record_id in scores.keys() & postings.keys()}
+                get = token_scores.get
+                for record_id, frequency in postings.items():
+                    token_scores[record_id] = get(record_id, 0.0) + weight * frequency / (
+                        frequency + c1 + c2 * lengths[record_id])
+            if scores is not None:
+                for record_id, score in token_scores.items():
+                    token_scores[record_id] = score + scores[record_id]
+            scores = token_scores
+            if not scores:
+                return []
+
+        if limit is None:
+            return sorted(scores.items(), key=itemgetter(1), reverse=True)
+        return heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+
+    def keys_of(self, record_id):
+        """Return the terms ``record_id`` is indexed under"""
+        self.build()
+        return list(self._documents.get(record_id, ()))
+
+    def totals(self):
+        """Return the number of records containing each term"""
+        self.build()
+        return {term: len(postings) for term, postings in self._postings.items()}
+
+    def empty(self):
+        """Return a new, empty index with the same fields and weights"""
+        return TextIndex(self.fields_func, self.weights)
+
+    def rebuild(self, records):
+        """Re-index every record of the collection ``records`` on first use"""
+        self._postings = {}
+        self._documents = {}
+        self._lengths = {}
+        self._total_length = 0.0
+        self._terms = []
+        self._pending = records
+
+    def build(self):
+        """Build the index now if rebuild() deferred it"""
+        if self._pending is None:
+            return
+        with self._build_lock:
+            if self._pending is not None:
+                self._build(self._pending)
+                self._pending = None
+
+    def _build(self, records):
+        postings = self._postings = {}
+        documents = self._documents = {}
+        lengths = self._lengths = {}
+        for record_id, record in records.items():
+            frequencies = self._term_frequencies(record)
+            if frequencies is None:
+                continue
+            for term, frequency in frequencies.items():
+                term_postings = postings.get(term)
+                if term_postings is None:
+                    term_postings = postings[term] = {}
+                term_postings[record_id] = frequency
+            documents[record_id] = list(frequencies)
+            lengths[record_id] = sum(frequencies.values())
+        self._total_length = sum(lengths.values())
+        self._terms = sorted(postings)
+
+
+class PrefixIndex:
+    """Sorted array of phrases for typeahead: every word-start suffix of a
+    phrase is a key, so "hack" suggests "Robotics Hackathon".
+
+    ``key_func`` returns the record's phrases as (kind, text) pairs, e.g.
+    ('event', title), or None to leave the record out. Identical phrases
+    from several records share one entry, so a lookup walks only as many
+    entries as it returns.
+    """
+
+    def __init__(self, key_func):
+        self.key_func = key_func
+        self._entries = []   # sorted (key, kind, text)
+        self._records = {}   # (key, kind, text) -> {record_id: True}
+        self._keys = {}      # record_id -> its entries
+
+    def _entries_for(self, record):
+        phrases = self.key_func(record)
+        entries = []
+        for kind, text in phrases or ():
+            if not text:
+                continue
+            words = tokenize(text)
+            for i in range(len(words)):
+                entries.append((' '.join(words[i:]), kind, text))
+        return list(dict.fromkeys(entries))
+
+    def add(self, record_id, record):
+        """Index the current phrases of ``record``"""
+        entries = self._entries_for(record)
+        if not entries:
+            return
+        self._keys[record_id] = entries
+        for entry in entries:
+            ids = self._records.get(entry)
+            if ids is None:
+                ids = self._records[entry] = {}
+                insort(self._entries, entry)
+            ids[record_id] = True
+
+    def remove(self, record_id):
+        """Drop ``record_id`` from the entries it was indexed under"""
+        for entry in self._keys.pop(record_id, ()):
+            ids = self._records[entry]
+            del ids[record_id]
+            if not ids:
+                del self._records[entry]
+                del self._entries[bisect_left(self._entries, entry)]
+
+    def suggest(self, prefix, limit=10):
+        """Return up to ``limit`` distinct (kind, text, record_id) matches of
+        ``prefix`` in alphabetical order, with one of the records behind
+        each phrase"""
+        prefix = ' '.join(tokenize(prefix))
+        if not prefix:
+            return []
+        entries = self._entries
+        i = bisect_left(entries, (prefix,))
+        found = {}
+        while i < len(entries) and len(found) < limit and entries[i][0].startswith(prefix):
+            key, kind, text = entries[i]
+            if (kind, text) not in found:
+                found[(kind, text)] = next(iter(self._records[entries[i]]))
+            i += 1
+        return [(kind, text, record_id) for (kind, text), record_id in found.items()]
+
+    def keys_of(self, record_id):
+        """Return the entries ``record_id`` is indexed under"""
+        return list(self._keys.get(record_id, ()))
+
+    def totals(self):
+        """Return the number of records behind each entry"""
+        return {entry: len(ids) for entry, ids in self._records.items()}
+
+    def empty(self):
+        """Return a new, empty index with the same key function"""
+        return PrefixIndex(self.key_func)
+
+    def rebuild(self, records):
+        """Re-index every record in ``records``"""
+        keys = self._keys = {}
+        entry_records = self._records = {}
+        for record_id, record in records.items():
+            entries = self._entries_for(record)
+            if not entries:
+                continue
+            keys[record_id] = entries
+            for entry in entries:
+                ids = entry_records.get(entry)
+                if ids is None:
+                    ids = entry_records[entry] = {}
+                ids[record_id] = True
+        self._entries = sorted(entry_records)
+
+
+def benchmark(count=50000):
+    """Time building, updating and querying an index of ``count`` synthetic
+    events against a substring scan of the same events"""
+    import random
+    from models import SEARCH_WEIGHTS, event_search_fields, event_suggestions
+
+    random.seed(0)
+    words = ['hackathon', 'robotics', 'workshop', 'python', 'cloud', 'design', 'music',
+             'quiz', 'debate', 'startup', 'security', 'machine', 'learning', 'data',
+             'football', 'cricket', 'photography', 'drama', 'coding', 'blockchain']
+    vocabulary = words + [f'word{i}' for i in range(5000)]
+    events = {}
+    for i in range(count):
+        events[f'e{i}'] = {
+            'id': f'e{i}', 'status': 'approved',
+            'title': ' '.join(random.sample(words, 2)) + f' {i}',
+            'description': ' '.join(random.choices(vocabulary, k=40)),
+            'category': random.choice(['Technical', 'Cultural', 'Sports', 'Workshop']),
+            'venue': random.choice(['Main Hall', 'Auditorium', 'Lab 3', 'Ground']),
+            'tags': random.sample(words, 3),
+            'skills_required': random.sample(words, 2),
+        }
+
+    index = TextIndex(event_search_fields, SEARCH_WEIGHTS)
+    started = time.perf_counter()
+    index.rebuild(events)
+    index.build()
+    print(f"Indexed {count} events in {time.perf_counter() - started:.2f} s")
+
+    started = time.perf_counter()
+    for i in range(1000):
+        record_id = f'e{i}'
+        index.remove(record_id)
+        index.add(record_id, dict(events[record_id], title='renamed robotics event'))
+    print(f"Update: {(time.perf_counter() - started) * 1000 / 1000:.3f} ms per event")
+
+    for query in ('hackathon', 'python workshop', 'rob', 'word4217', 'word4217 cloud', 'word42'):
+        runs = 20
+        started = time.perf_counter()
+        for _ in range(runs):
+            results = index.search(query, limit=20)
+        indexed_ms = (time.perf_counter() - started) * 1000 / runs
+        started = time.perf_counter()
+        needle = query.lower()
+        matches = [e for e in events.values()
+                   if needle in e['title'].lower() or needle in e['description'].lower()]
+        scan_ms = (time.perf_counter() - started) * 1000
+        print(f"{query!r}: index {indexed_ms:.2f} ms ({len(results)} shown), "
+              f"substring scan {scan_ms:.2f} ms ({len(matches)} matches)")
+
+    prefixes = PrefixIndex(event_suggestions)
+    started = time.perf_counter()
+    prefixes.rebuild(events)
+    print(f"Indexed suggestions in {time.perf_counter() - started:.2f} s")
+    for prefix in ('h', 'rob', 'robotics d', 'work', 'tech'):
+        runs = 1000
+        started = time.perf_counter()
+        for _ in range(runs):
+            suggestions = prefixes.suggest(prefix, 8)
+        print(f"suggest {prefix!r}: {(time.perf_counter() - started) * 1000 / runs:.3f} ms "
+              f"({len(suggestions)} shown)")
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -108,7 +108,7 @@ def setup_database():
                 password_hash=generate_password_hash("admin123"),
                 role="admin"
             )
-            data_store.users[admin_user.id] = {
+            data_store.add_user(admin_user.id, {
                 'id': admin_user.id,
                 'username': admin_user.username,
                 'email': admin_user.email,
@@ -119,7 +119,7 @@ def setup_database():
                 'full_name': "Admin User",
                 'register_number': None,
                 'department': None
-            }
+            })
             print("✅ Default admin user (admin@smvec.ac.in / admin123) created.")
 
         return True
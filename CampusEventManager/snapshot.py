@@ -0,0 +1,154 @@
+"""Binary datastore snapshots.
+
+Layout: a fixed header followed by the collections pickled with protocol 5.
+
+    magic     8 bytes   b'CEMSNAP\\0'
+    version   uint16    snapshot format version
+    protocol  uint16    pickle protocol of the payload
+    length    uint64    payload length in bytes
+    checksum  uint32    CRC-32 of the payload
+
+Record collections are stored column-wise: the record type, its field
+names, the ids and one plain tuple of values per record, with datetimes as
+native pickled datetimes. Tuples pickle and unpickle in C, and loading
+rebuilds the records directly without any per-field decoding.
+
+Run as a script to convert between formats:
+
+    python snapshot.py data/datastore.json data/datastore.snapshot
+    python snapshot.py data/datastore.snapshot data/datastore.json
+"""
+import pickle
+import struct
+import sys
+import zlib
+from collections import deque
+from itertools import repeat
+from operator import attrgetter
+
+import codec
+from records import Record
+
+MAGIC = b'CEMSNAP\0'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('>8sHHQI')
+
+
+class SnapshotError(Exception):
+    """Raised for files that are not valid snapshots"""
+
+
+class _Missing:
+    """Marks a field a record does not have"""
+
+
+def _pack(records):
+    record_type = None
+    for record in records.values():
+        if not isinstance(record, Record):
+            # Plain or not yet decoded records are stored as they are
+            return records
+        record_type = record_type or type(record)
+        if type(record) is not record_type:
+            return records
+    if record_type is None:
+        return records
+    fields = record_type._fields
+    get_row = attrgetter(*fields, '_extra')
+    rows = []
+    for record in records.values():
+        try:
+            rows.append(get_row(record))
+        except AttributeError:
+            rows.append(tuple([getattr(record, field, _Missing) for field in fields])
+                        + (record._extra,))
+    return (record_type, fields, list(records), rows)
+
+
+def _unpack(packed):
+    if isinstance(packed, dict):
+        return packed
+    record_type, fields, ids, rows = packed
+    if not all(field in record_type._field_set for field in fields):
+        # Written by a version that declared other fields
+        return {record_id: record_type.from_dict(
+                    {field: value for field, value in zip(fields, row) if value is not _Missing}
+                    | (row[-1] or {}))
+                for record_id, row in zip(ids, rows)}
+
+    new = object.__new__
+    consume = deque(maxlen=0).extend
+    records = {}
+    for record_id, row in zip(ids, rows):
+        record = new(record_type)
+        # Assign every slot in one C-level loop, then unset the few fields
+        # the record did not have
+        consume(map(setattr, repeat(record), fields, row))
+        if _Missing in row:
+            for field, value in zip(fields, row):
+                if value is _Missing:
+                    delattr(record, field)
+        record._extra = row[-1]
+        records[record_id] = record
+    return records
+
+
+def dumps(collections):
+    """Serialize ``collections`` to snapshot bytes"""
+    packed = {name: _pack(records) for name, records in collections.items()}
+    payload = pickle.dumps(packed, protocol=5)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 5, len(payload), zlib.crc32(payload))
+    return header + payload
+
+
+def loads(data):
+    """Return the collections stored in snapshot bytes, checking the header
+    and checksum first"""
+    if len(data) < HEADER.size:
+        raise SnapshotError("Snapshot is truncated")
+    magic, version, _, length, checksum = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError("Not a datastore snapshot")
+    if version > FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+    payload = memoryview(data)[HEADER.size:]
+    if len(payload) != length:
+        raise SnapshotError("Snapshot is truncated")
+    if zlib.crc32(payload) != checksum:
+        raise SnapshotError("Snapshot checksum mismatch")
+    return {name: _unpack(packed) for name, packed in pickle.loads(payload).items()}
+
+
+def read_snapshot(path):
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def write_snapshot(path, collections):
+    with open(path, 'wb') as f:
+        f.write(dumps(collections))
+
+
+def convert(source, target):
+    """Convert a JSON data file to a snapshot or back, by file extension"""
+    from models import make_record
+
+    if source.endswith('.json'):
+        with open(source, 'r') as f:
+            data = codec.load(f)
+        # Store decoded records so loading the snapshot skips decoding
+        data = {name: {record_id: make_record(name, record) for record_id, record in records.items()}
+                for name, records in data.items()}
+        write_snapshot(target, data)
+    else:
+        data = read_snapshot(source)
+        with open(target, 'w') as f:
+            codec.dump(data, f, indent=True)
+    print(f"Converted {source} to {target}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage: python snapshot.py SOURCE TARGET")
+        sys.exit(1)
+    convert(sys.argv[1], sys.argv[2])
@@ -0,0 +1,202 @@
+import os
+import sqlite3
+import threading
+
+import codec
+
+# Columns copied out of each record so SQLite can index them
+INDEXED_FIELDS = {
+    'users': ('email', 'role'),
+    'events': ('organizer_id', 'status', 'category', 'start_date'),
+    'registrations': ('user_id', 'event_id'),
+    'feedback': ('user_id', 'event_id'),
+    'notifications': ('user_id',),
+    'teams': ('event_id', 'leader_id', 'team_code'),
+    'submissions': ('team_id', 'event_id'),
+    'achievements': ('user_id', 'event_id'),
+    'leaderboards': ('event_id',),
+}
+
+
+class SqliteStorage:
+    """Persist each record as a row in a per-collection SQLite table.
+
+    Every commit is stamped with a monotonically increasing revision and
+    deletes leave a tombstone, so other processes sharing the database can
+    pull just the rows that changed since they last looked (see ``poll``).
+    """
+
+    def __init__(self, db_file, json_file=None):
+        self.db_file = db_file
+        self.json_file = json_file
+        self.last_rev = 0
+        self._own_revs = set()
+        self._lock = threading.Lock()
+        self._connect()
+        self._create_schema()
+        self._data_version = self._current_data_version()
+
+    def _connect(self):
+        self.conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False,
+                                    isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+
+    def after_fork(self):
+        """Open a fresh connection in a forked worker; SQLite connections
+        must not be shared across processes"""
+        self._lock = threading.Lock()
+        self._connect()
+        self._data_version = self._current_data_version()
+
+    def _create_schema(self):
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            cur.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('rev', 0)")
+            cur.execute('CREATE TABLE IF NOT EXISTS tombstones ('
+                        'collection TEXT NOT NULL, id TEXT NOT NULL, rev INTEGER NOT NULL, '
+                        'PRIMARY KEY (collection, id))')
+            cur.execute('CREATE INDEX IF NOT EXISTS idx_tombstones_rev ON tombstones (rev)')
+            for collection, fields in INDEXED_FIELDS.items():
+                columns = ''.join(f', {field} TEXT' for field in fields)
+                cur.execute(f'CREATE TABLE IF NOT EXISTS {collection} ('
+                            f'id TEXT PRIMARY KEY, data TEXT NOT NULL, rev INTEGER NOT NULL{columns})')
+                cur.execute(f'CREATE INDEX IF NOT EXISTS idx_{collection}_rev ON {collection} (rev)')
+                for field in fields:
+                    cur.execute(f'CREATE INDEX IF NOT EXISTS idx_{collection}_{field} '
+                                f'ON {collection} ({field})')
+            cur.execute('CREATE INDEX IF NOT EXISTS idx_registrations_user_event '
+                        'ON registrations (user_id, event_id)')
+
+    def _current_data_version(self):
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _row(self, collection, record_id, record):
+        values = [record_id, codec.dumps(record)]
+        for field in INDEXED_FIELDS[collection]:
+            value = record.get(field)
+            values.append(None if value is None else str(value))
+        return values
+
+    def _upsert(self, cur, collection, record_id, record, rev):
+        fields = INDEXED_FIELDS[collection]
+        columns = ', '.join(('id', 'data') + fields + ('rev',))
+        placeholders = ', '.join('?' * (len(fields) + 3))
+        cur.execute(f'INSERT OR REPLACE INTO {collection} ({columns}) VALUES ({placeholders})',
+                    self._row(collection, record_id, record) + [rev])
+        cur.execute('DELETE FROM tombstones WHERE collection = ? AND id = ?', (collection, record_id))
+
+    def _delete(self, cur, collection, record_id, rev):
+        cur.execute(f'DELETE FROM {collection} WHERE id = ?', (record_id,))
+        cur.execute('INSERT OR REPLACE INTO tombstones (collection, id, rev) VALUES (?, ?, ?)',
+                    (collection, record_id, rev))
+
+    def _next_rev(self, cur):
+        cur.execute("UPDATE meta SET value = value + 1 WHERE key = 'rev'")
+        rev = cur.execute("SELECT value FROM meta WHERE key = 'rev'").fetchone()[0]
+        self._own_revs.add(rev)
+        return rev
+
+    def _committed(self, rev, caught_up):
+        # With no foreign commits since the last poll there is nothing to
+        # pull below our own revision, so skip straight past it.
+        if caught_up:
+            self.last_rev = rev
+            self._own_revs.discard(rev)
+
+    def load(self):
+        """Load every collection, importing the JSON data file on first use"""
+        with self._lock:
+            self.last_rev = self.conn.execute("SELECT value FROM meta WHERE key = 'rev'").fetchone()[0]
+            data = {}
+            for collection in INDEXED_FIELDS:
+                rows = self.conn.execute(f'SELECT id, data FROM {collection}')
+                data[collection] = {record_id: codec.loads(raw) for record_id, raw in rows}
+
+        if not any(data.values()):
+            if self.json_file and os.path.exists(self.json_file):
+                with open(self.json_file, 'r') as f:
+                    data = codec.load(f)
+                print(f"Importing {self.json_file} into {self.db_file}")
+                self.checkpoint(data)
+                return data
+            return None
+        return data
+
+    def save(self, collections, changes):
+        """Write the changed records in a single transaction"""
+        if not changes:
+            return
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute('BEGIN IMMEDIATE')
+            try:
+                caught_up = self._current_data_version() == self._data_version
+                rev = self._next_rev(cur)
+                for collection, record_id in changes:
+                    records = collections[collection]
+                    if record_id in records:
+                        self._upsert(cur, collection, record_id, records[record_id], rev)
+                    else:
+                        self._delete(cur, collection, record_id, rev)
+                cur.execute('COMMIT')
+            except Exception:
+                cur.execute('ROLLBACK')
+                raise
+            self._committed(rev, caught_up)
+
+    def full_collections(self, changes):
+        """A save writes just the changed rows"""
+        return ()
+
+    def checkpoint(self, collections):
+        """Replace the contents of every table with ``collections``"""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute('BEGIN IMMEDIATE')
+            try:
+                caught_up = self._current_data_version() == self._data_version
+                rev = self._next_rev(cur)
+                for collection in INDEXED_FIELDS:
+                    records = collections.get(collection, {})
+                    stale = [row[0] for row in cur.execute(f'SELECT id FROM {collection}')
+                             if row[0] not in records]
+                    for record_id in stale:
+                        self._delete(cur, collection, record_id, rev)
+                    for record_id, record in records.items():
+                        self._upsert(cur, collection, record_id, record, rev)
+                cur.execute('COMMIT')
+            except Exception:
+                cur.execute('ROLLBACK')
+                raise
+            self._committed(rev, caught_up)
+
+    def poll(self):
+        """Return (collection, record_id, record) for rows committed by other
+        processes since the last poll; ``record`` is None for deletions."""
+        with self._lock:
+            data_version = self._current_data_version()
+            if data_version == self._data_version:
+                return []
+            self._data_version = data_version
+
+            changes = []
+            newest = self.last_rev
+            for collection in INDEXED_FIELDS:
+                rows = self.conn.execute(f'SELECT id, data, rev FROM {collection} WHERE rev > ?',
+                                         (self.last_rev,))
+                for record_id, raw, rev in rows:
+                    newest = max(newest, rev)
+                    if rev not in self._own_revs:
+                        changes.append((collection, record_id, codec.loads(raw)))
+            rows = self.conn.execute('SELECT collection, id, rev FROM tombstones WHERE rev > ?',
+                                     (self.last_rev,))
+            for collection, record_id, rev in rows:
+                newest = max(newest, rev)
+                if rev not in self._own_revs:
+                    changes.append((collection, record_id, None))
+
+            self.last_rev = newest
+            self._own_revs = {rev for rev in self._own_revs if rev > newest}
+            return changes
@@ -283,66 +283,92 @@ function showNotification(message, type = 'info', duration = 5000) {
     }, duration);
 }
 
-// Event search and filter functionality
+// Event search: typeahead suggestions from the server; the filters are
+// applied server-side by submitting the form
 function initializeEventSearch() {
-    const searchInput = document.querySelector('input[name="search"]');
-    const categorySelect = document.querySelector('select[name="category"]');
-    const dateSelect = document.querySelector('select[name="date"]');
+    const searchInput = document.querySelector('input[name="search"][data-suggest-url]');
+    if (!searchInput) {
+        return;
+    }
 
-    if (searchInput || categorySelect || dateSelect) {
-        let searchTimeout;
+    const form = searchInput.form;
 
-        function performSearch() {
-            const searchTerm = searchInput ? searchInput.value.toLowerCase() : '';
-            const selectedCategory = categorySelect ? categorySelect.value : '';
-            const selectedDate = dateSelect ? dateSelect.value : '';
+    // Suggestions dropdown under the search box
+    const menu = document.createElement('div');
+    menu.className = 'dropdown-menu w-100';
+    searchInput.parentNode.classList.add('position-relative');
+    searchInput.parentNode.appendChild(menu);
 
-            const eventCards = document.querySelectorAll('.event-card');
+    let searchTimeout;
+    let latestQuery = '';
 
-            eventCards.forEach(function(card) {
-                const title = card.querySelector('.card-title')?.textContent.toLowerCase() || '';
-                const description = card.querySelector('.card-text')?.textContent.toLowerCase() || '';
-                const category = card.querySelector('.badge')?.textContent || '';
+    function hideSuggestions() {
+        menu.classList.remove('show');
+    }
 
-                let showCard = true;
+    function showSuggestions(suggestions) {
+        menu.innerHTML = '';
+        suggestions.forEach(function(suggestion) {
+            const item = document.createElement('a');
+            item.className = 'dropdown-item d-flex justify-content-between';
+            item.href = suggestion.url;
+
+            const text = document.createElement('span');
+            text.textContent = suggestion.text;
+            const type = document.createElement('small');
+            type.className = 'text-muted ms-2';
+            type.textContent = suggestion.type;
+
+            item.append(text, type);
+            menu.appendChild(item);
+        });
+        menu.classList.toggle('show', suggestions.length > 0);
+    }
 
-                // Search filter
-                if (searchTerm && !title.includes(searchTerm) && !description.includes(searchTerm)) {
-                    showCard = false;
-                }
+    function fetchSuggestions() {
+        const query = searchInput.value.trim();
+        latestQuery = query;
+        if (!query) {
+            hideSuggestions();
+            return;
+        }
 
-                // Category filter
-                if (selectedCategory && category !== selectedCategory) {
-                    showCard = false;
+        fetch(searchInput.dataset.suggestUrl + '?q=' + encodeURIComponent(query))
+            .then(function(response) {
+                return response.json();
+            })
+            .then(function(data) {
+                // Drop answers to queries the user has already typed past
+                if (data.query === latestQuery) {
+                    showSuggestions(data.suggestions);
                 }
+            })
+            .catch(hideSuggestions);
+    }
 
-                // Show/hide card
-                if (showCard) {
-                    card.style.display = 'block';
-                    card.classList.add('fade-in');
-                } else {
-                    card.style.display = 'none';
-                }
-            });
-        }
+    // Debounced suggestions
+    searchInput.addEventListener('input', function() {
+        clearTimeout(searchTimeout);
+        searchTimeout = setTimeout(fetchSuggestions, 150);
+    });
 
-        // Debounced search
-        if (searchInput) {
-            searchInput.addEventListener('input', function() {
-                clearTimeout(searchTimeout);
-                searchTimeout = setTimeout(performSearch, 300);
-            });
+    searchInput.addEventListener('keydown', function(e) {
+        if (e.key === 'Escape') {
+            hideSuggestions();
         }
+    });
 
-        // Immediate filter on select change
-        if (categorySelect) {
-            categorySelect.addEventListener('change', performSearch);
-        }
+    // Leave time for a click on a suggestion to land
+    searchInput.addEventListener('blur', function() {
+        setTimeout(hideSuggestions, 200);
+    });
 
-        if (dateSelect) {
-            dateSelect.addEventListener('change', performSearch);
-        }
-    }
+    // Immediate filter on select change
+    form.querySelectorAll('select').forEach(function(select) {
+        select.addEventListener('change', function() {
+            form.submit();
+        });
+    });
 }
 
 // File upload preview
@@ -0,0 +1,562 @@
+import json
+import os
+import pickle
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: multi-process mode falls back to unlocked writes
+    fcntl = None
+
+import codec
+import snapshot
+
+# Previous versions of each data file kept as <file>.1, <file>.2, ...
+GENERATIONS = int(os.environ.get('DATASTORE_GENERATIONS', 2))
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path or '.', os.O_RDONLY)
+    except OSError:
+        # Directories cannot be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, data, generations=GENERATIONS):
+    """Replace ``path`` with ``data`` (str or bytes) so that a crash at any
+    point leaves either the old or the new file, never a partial one. The
+    replaced file is kept as ``<path>.1`` and older ones shift up, keeping
+    at most ``generations``."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb' if isinstance(data, bytes) else 'w') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+    if generations and os.path.exists(path):
+        for n in range(generations - 1, 0, -1):
+            if os.path.exists(f"{path}.{n}"):
+                os.replace(f"{path}.{n}", f"{path}.{n + 1}")
+        previous = f"{path}.1"
+        if os.path.exists(previous):
+            os.remove(previous)
+        try:
+            os.link(path, previous)
+        except OSError:
+            shutil.copy2(path, previous)
+
+    os.replace(tmp_path, path)
+    _fsync_dir(os.path.dirname(path))
+
+
+def read_newest_valid(path, read, generations=GENERATIONS):
+    """Return ``read(candidate)`` for the newest of ``path`` and its retained
+    generations that reads back cleanly, or None if none of them exist"""
+    error = None
+    for candidate in [path] + [f"{path}.{n}" for n in range(1, generations + 1)]:
+        if not os.path.exists(candidate):
+            continue
+        try:
+            data = read(candidate)
+        except (ValueError, EOFError, pickle.UnpicklingError, snapshot.SnapshotError) as e:
+            print(f"Skipping unreadable {candidate}: {e}")
+            error = error or e
+            continue
+        if candidate != path:
+            print(f"Recovered data from {candidate}")
+        return data
+    if error is not None:
+        raise error
+    return None
+
+
+def _read_json(path):
+    with open(path, 'r') as f:
+        return codec.load(f)
+
+
+class JsonStorage:
+    """Persist the whole datastore as a single JSON snapshot file"""
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+
+    def load(self):
+        """Return the stored collections, or None if nothing has been saved
+        yet. A damaged file is skipped in favour of the newest readable
+        generation."""
+        return read_newest_valid(self.data_file, _read_json)
+
+    def save(self, collections, changes):
+        """Persist pending changes; a snapshot store simply rewrites everything"""
+        self.checkpoint(collections)
+
+    def checkpoint(self, collections):
+        """Write a full snapshot of all collections"""
+        atomic_write(self.data_file, codec.dumps(collections, indent=True))
+
+    def full_collections(self, changes):
+        """Return the names of the collections save() reads in full for
+        ``changes``, or None for all of them; of the others it is only
+        given the changed records"""
+        return None
+
+    def poll(self):
+        """Return records changed by other processes since the last poll"""
+        return []
+
+
+class BinaryStorage(JsonStorage):
+    """Persist the whole datastore as a binary snapshot (see snapshot.py).
+
+    Loading unpickles ready-made records instead of parsing and decoding
+    JSON, and the file is considerably smaller. The JSON data file is
+    imported on first use.
+    """
+
+    def __init__(self, data_file):
+        super().__init__(data_file)
+        self.snapshot_file = os.path.splitext(data_file)[0] + '.snapshot'
+
+    def load(self):
+        """Return the stored collections, or None if nothing has been saved yet"""
+        data = read_newest_valid(self.snapshot_file, snapshot.read_snapshot)
+        if data is not None:
+            return data
+        data = super().load()
+        if data is not None:
+            print(f"Importing {self.data_file} into {self.snapshot_file}")
+            atomic_write(self.snapshot_file, snapshot.dumps(data))
+        return data
+
+    def checkpoint(self, collections):
+        """Write a full snapshot of all collections"""
+        atomic_write(self.snapshot_file, snapshot.dumps(collections))
+
+
+class JournalStorage(JsonStorage):
+    """Snapshot file plus an append-only journal of record changes.
+
+    Each save appends one compact line per changed record, so the cost of a
+    save is proportional to the change rather than the size of the database.
+    A save of several records is written as a single ``batch`` line, so a
+    crash mid-append loses the whole batch rather than part of it. Once the
+    journal holds ``checkpoint_every`` entries it is folded into a fresh
+    snapshot and truncated.
+    """
+
+    def __init__(self, data_file, checkpoint_every=1000):
+        super().__init__(data_file)
+        self.journal_file = os.path.splitext(data_file)[0] + '.journal'
+        self.checkpoint_every = checkpoint_every
+        self.journal_entries = 0
+
+    def load(self):
+        """Load the snapshot and replay the journal tail on top of it"""
+        data = super().load()
+        if not os.path.exists(self.journal_file):
+            return data
+
+        data = data if data is not None else {}
+        self.journal_entries = 0
+        # Byte offset just past the last complete line
+        end = 0
+        with open(self.journal_file, 'rb') as f:
+            for text in f:
+                try:
+                    line = codec.loads(text)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append; everything
+                    # before it was fully written.
+                    break
+                for entry in line['entries'] if line['op'] == 'batch' else (line,):
+                    records = data.setdefault(entry['collection'], {})
+                    if entry['op'] == 'put':
+                        records[entry['id']] = entry['data']
+                    else:
+                        records.pop(entry['id'], None)
+                    self.journal_entries += 1
+                end += len(text)
+            size = f.tell()
+
+        # Appends must start on a fresh line: anything written after a torn
+        # line would be lost with it on the next replay
+        if end < size:
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(end)
+                f.flush()
+                os.fsync(f.fileno())
+            print(f"Discarded a torn final entry from {self.journal_file}")
+        elif end and not text.endswith(b'\n'):
+            with open(self.journal_file, 'ab') as f:
+                f.write(b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+        return data
+
+    def save(self, collections, changes):
+        """Append one journal entry per changed record, as one line"""
+        if not changes:
+            return
+        entries = []
+        for collection, record_id in changes:
+            records = collections[collection]
+            if record_id in records:
+                entries.append({'op': 'put', 'collection': collection, 'id': record_id,
+                                'data': records[record_id]})
+            else:
+                entries.append({'op': 'delete', 'collection': collection, 'id': record_id})
+        entry = entries[0] if len(entries) == 1 else {'op': 'batch', 'entries': entries}
+
+        with open(self.journal_file, 'a') as f:
+            f.write(codec.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_entries += len(entries)
+
+        if self.journal_entries >= self.checkpoint_every:
+            self.checkpoint(collections)
+
+    def full_collections(self, changes):
+        """Only a save that triggers a checkpoint reads every record"""
+        if self.journal_entries + len(changes) >= self.checkpoint_every:
+            return None
+        return ()
+
+    def checkpoint(self, collections):
+        """Fold the journal into a new snapshot and truncate it"""
+        super().checkpoint(collections)
+        open(self.journal_file, 'w').close()
+        self.journal_entries = 0
+
+
+class BinaryJournalStorage(JournalStorage, BinaryStorage):
+    """Journal on top of a binary snapshot"""
+
+
+class SharedJsonStorage(JsonStorage):
+    """JSON snapshot shared by several worker processes.
+
+    Writes happen under an exclusive lock on ``<data_file>.lock`` and stamp
+    the file with a ``_meta`` header holding a monotonically increasing
+    version plus the version at which each collection last changed. The
+    header is written first, so ``poll`` can check a cheap stat and a small
+    read of the file head before reloading just the collections that other
+    processes changed. A save that finds the file moved on since this
+    process last saw it merges its own changes on top instead of
+    clobbering the other writers.
+    """
+
+    HEAD_BYTES = 4096
+
+    def __init__(self, data_file):
+        super().__init__(data_file)
+        self.lock_file = data_file + '.lock'
+        self.version = 0
+        self.collection_versions = {}
+        self._stat = None
+        # Record ids per collection as of the last load, save or poll, so a
+        # reload can tell which records other processes deleted
+        self._known_ids = {}
+        # Foreign changes picked up while merging a save, handed out by poll
+        self._pending = []
+        # Guards the state above against request threads (refresh) and the
+        # group-commit flusher; taken before the file lock
+        self._lock = threading.Lock()
+
+    def after_fork(self):
+        """A forked worker gets a fresh lock, in case another thread held
+        it at the fork"""
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self, exclusive):
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _file_stat(self):
+        try:
+            st = os.stat(self.data_file)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _read_meta(self):
+        """Read only the ``_meta`` header from the head of the data file"""
+        try:
+            with open(self.data_file, 'r') as f:
+                head = f.read(self.HEAD_BYTES)
+        except FileNotFoundError:
+            return None
+        start = head.find('"_meta"')
+        if start == -1:
+            return {'version': 0, 'collections': {}}
+        start = head.index(':', start) + 1
+        try:
+            meta, _ = json.JSONDecoder().raw_decode(head[start:].lstrip())
+        except json.JSONDecodeError:
+            return None
+        return meta
+
+    def _read(self):
+        data = super().load()
+        if data is None:
+            return None, {'version': 0, 'collections': {}}
+        return data, data.pop('_meta', {'version': 0, 'collections': {}})
+
+    def _write(self, collections, meta):
+        atomic_write(self.data_file, codec.dumps({'_meta': meta, **collections}, indent=True))
+        self._seen(meta, collections)
+
+    def _seen(self, meta, data):
+        self.version = meta['version']
+        self.collection_versions = dict(meta.get('collections', {}))
+        self._known_ids = {name: set(records) for name, records in (data or {}).items()}
+        self._stat = self._file_stat()
+
+    def _changed_collections(self, meta):
+        return [name for name, version in meta.get('collections', {}).items()
+                if version > self.collection_versions.get(name, 0)]
+
+    def _collection_changes(self, data, names, known=None):
+        """Every record of the collections in ``names`` as a put, plus a
+        delete for ids present in ``known`` but gone from the file"""
+        changes = []
+        for name in names:
+            records = data.get(name, {})
+            for record_id, record in records.items():
+                changes.append((name, record_id, record))
+            for record_id in (known or {}).get(name, ()):
+                if record_id not in records:
+                    changes.append((name, record_id, None))
+        return changes
+
+    def load(self):
+        """Load the snapshot under a shared lock, remembering its version"""
+        with self._lock, self._locked(exclusive=False):
+            data, meta = self._read()
+            self._seen(meta, data)
+        return data
+
+    def save(self, collections, changes):
+        """Write the snapshot under the exclusive lock, merging onto the file
+        first if another process has written since we last looked"""
+        if not changes:
+            return
+        with self._lock:
+            with self._locked(exclusive=True):
+                meta = self._read_meta() or {'version': 0, 'collections': {}}
+                if meta['version'] != self.version:
+                    disk, meta = self._read()
+                    disk = disk or {}
+                    foreign = self._changed_collections(meta)
+                    self._pending.extend(
+                        change for change in self._collection_changes(disk, foreign, collections)
+                        if (change[0], change[1]) not in changes)
+                    for collection, record_id in changes:
+                        records = disk.setdefault(collection, {})
+                        if record_id in collections[collection]:
+                            records[record_id] = collections[collection][record_id]
+                        else:
+                            records.pop(record_id, None)
+                    collections = disk
+
+                version = meta['version'] + 1
+                collection_versions = dict(meta.get('collections', {}))
+                for collection, _ in changes:
+                    collection_versions[collection] = version
+                self._write(collections, {'version': version, 'collections': collection_versions})
+
+    def checkpoint(self, collections):
+        """Overwrite the snapshot with ``collections`` under the exclusive lock"""
+        with self._lock, self._locked(exclusive=True):
+            meta = self._read_meta() or {'version': 0, 'collections': {}}
+            version = meta['version'] + 1
+            self._write(collections, {'version': version,
+                                      'collections': {name: version for name in collections}})
+
+    def poll(self):
+        """Return the records of collections other processes have changed
+        since the last poll or save"""
+        with self._lock:
+            changes, self._pending = self._pending, []
+            if self._file_stat() == self._stat:
+                return changes
+            with self._locked(exclusive=False):
+                meta = self._read_meta()
+                if meta is None or meta['version'] == self.version:
+                    self._stat = self._file_stat()
+                    return changes
+                data, meta = self._read()
+                foreign = self._changed_collections(meta)
+                known = {name: self._known_ids.get(name, ()) for name in foreign}
+                changes.extend(self._collection_changes(data or {}, foreign, known))
+                self._seen(meta, data)
+            return changes
+
+
+class ShardedJsonStorage:
+    """One JSON file per collection in a directory next to the data file.
+
+    A save rewrites only the collections that have changed records, so
+    marking a notification read no longer rewrites every user and event.
+    Shards are read concurrently on load.
+    """
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        self.shard_dir = os.path.splitext(data_file)[0]
+
+    def _shard_path(self, collection):
+        return os.path.join(self.shard_dir, collection + '.json')
+
+    def _load_shard(self, collection):
+        return read_newest_valid(self._shard_path(collection), _read_json)
+
+    def _write_shard(self, collection, records):
+        atomic_write(self._shard_path(collection), codec.dumps(records, indent=True))
+
+    def load(self):
+        """Load every shard, importing the single-file snapshot on first use"""
+        names = []
+        if os.path.isdir(self.shard_dir):
+            names = [name[:-5] for name in os.listdir(self.shard_dir) if name.endswith('.json')]
+        if not names:
+            data = JsonStorage(self.data_file).load()
+            if data is not None:
+                print(f"Splitting {self.data_file} into {self.shard_dir}")
+                self.checkpoint(data)
+            return data
+
+        with ThreadPoolExecutor(max_workers=len(names)) as pool:
+            return dict(zip(names, pool.map(self._load_shard, names)))
+
+    def save(self, collections, changes):
+        """Rewrite the shards of collections with changed records"""
+        for collection in {collection for collection, _ in changes}:
+            self._write_shard(collection, collections[collection])
+
+    def full_collections(self, changes):
+        """A save rewrites the shards of the changed collections"""
+        return {collection for collection, _ in changes}
+
+    def checkpoint(self, collections):
+        """Rewrite every shard"""
+        os.makedirs(self.shard_dir, exist_ok=True)
+        for collection, records in collections.items():
+            self._write_shard(collection, records)
+
+    def poll(self):
+        """Return records changed by other processes since the last poll"""
+        return []
+
+
+def create_storage(backend, data_file):
+    """Build the storage backend named by ``backend``"""
+    binary = os.environ.get('DATASTORE_SNAPSHOT_FORMAT', 'json') == 'binary'
+    if backend == 'json':
+        if os.environ.get('DATASTORE_MULTIPROCESS', '').lower() in ('1', 'true', 'yes'):
+            return SharedJsonStorage(data_file)
+        return BinaryStorage(data_file) if binary else JsonStorage(data_file)
+    if backend == 'sharded':
+        return ShardedJsonStorage(data_file)
+    if backend == 'journal':
+        checkpoint_every = int(os.environ.get('DATASTORE_CHECKPOINT_EVERY', 1000))
+        if binary:
+            return BinaryJournalStorage(data_file, checkpoint_every)
+        return JournalStorage(data_file, checkpoint_every)
+    if backend == 'sqlite':
+        from sqlite_storage import SqliteStorage
+        db_file = os.environ.get('DATASTORE_SQLITE_PATH',
+                                 os.path.splitext(data_file)[0] + '.sqlite3')
+        return SqliteStorage(db_file, json_file=data_file)
+    raise ValueError(f"Unknown datastore backend: {backend}")
+
+
+def benchmark(registrations=200000):
+    """Build a data file with ``registrations`` synthetic registrations
+    (and users, events and notifications in proportion), then time a
+    DataStore start on each backend after its first-start import"""
+    import tempfile
+    import time
+    from datetime import datetime, timedelta
+
+    from models import DataStore
+
+    started = datetime(2026, 1, 1)
+    users = {f'u{i}': {'id': f'u{i}', 'username': f'user{i}', 'email': f'user{i}@example.edu',
+                       'password_hash': 'x' * 100, 'role': 'student', 'is_active': True,
+                       'full_name': f'User {i}', 'department': 'CSE', 'created_at': started}
+             for i in range(max(1, registrations // 40))}
+    events = {f'e{i}': {'id': f'e{i}', 'title': f'Event {i}', 'description': 'd' * 300,
+                        'organizer_id': 'u0', 'venue': 'Main Hall', 'category': 'Technical',
+                        'status': 'approved', 'start_date': started + timedelta(days=i % 90),
+                        'created_at': started, 'current_attendees': 0}
+              for i in range(max(1, registrations // 200))}
+    user_ids, event_ids = list(users), list(events)
+    data = {'users': users, 'events': events, 'registrations': {}, 'notifications': {}}
+    for i in range(registrations):
+        user_id, event_id = user_ids[i % len(user_ids)], event_ids[i % len(event_ids)]
+        data['registrations'][f'r{i}'] = {'id': f'r{i}', 'user_id': user_id,
+                                          'event_id': event_id, 'registered_at': started,
+                                          'attended': False}
+        events[event_id]['current_attendees'] += 1
+        if i % 4 == 0:
+            data['notifications'][f'n{i}'] = {'id': f'n{i}', 'user_id': user_id,
+                                              'title': 'Registered', 'message': 'See you there',
+                                              'type': 'info', 'read': False, 'created_at': started}
+
+    directory = tempfile.mkdtemp()
+    data_file = os.path.join(directory, 'datastore.json')
+    JsonStorage(data_file).checkpoint(data)
+    codec_name = 'stdlib json' if codec.orjson is None else 'orjson'
+    print(f"{os.path.getsize(data_file) / 1e6:.0f} MB data file, {codec_name}")
+
+    results = []
+    for label, backend, lazy, env in (
+            ('json', 'json', False, {}),
+            ('json, binary snapshot', 'json', False, {'DATASTORE_SNAPSHOT_FORMAT': 'binary'}),
+            ('json, lazy', 'json', True, {}),
+            ('journal', 'journal', False, {}),
+            ('sharded', 'sharded', False, {}),
+            ('sqlite', 'sqlite', False, {})):
+        os.environ.update(env)
+        try:
+            # The first start imports the data file into the backend's format
+            DataStore(data_file, backend=backend)
+            timings = []
+            for _ in range(3):
+                start = time.perf_counter()
+                DataStore(data_file, backend=backend, lazy=lazy)
+                timings.append(time.perf_counter() - start)
+        finally:
+            for name in env:
+                del os.environ[name]
+        results.append((label, min(timings)))
+    shutil.rmtree(directory)
+
+    for label, seconds in results:
+        print(f"{label}: {seconds:.2f} s to start (best of 3)")
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
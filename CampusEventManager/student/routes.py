@@ -1,7 +1,9 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
-from models import data_store, Registration, Feedback
-from utils import login_required, send_notification, generate_qr_code
-from datetime import datetime, timedelta
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, make_response, abort
+from models import data_store, Registration, Feedback, EVENT_FACETS, sort_time
+from utils import login_required, send_notification, registration_qr_data
+from qr_codes import FALLBACK_PNG, get_qr_png, qr_cache_key, prerender_qr_codes
+from pagination import page_args, paginate
+from datetime import datetime
 
 student_bp = Blueprint('student', __name__)
 
@@ -14,44 +16,18 @@ student_bp.register_blueprint(team_bp, url_prefix='/team')
 def dashboard():
     user_id = session['user_id']
 
-    # Get upcoming events (approved only)
-    upcoming_events = []
-    for event_id, event in data_store.events.items():
-        if event['status'] == 'approved':
-            # Ensure start_date is a datetime object
-            start_date = event['start_date']
-            if isinstance(start_date, str):
-                try:
-                    start_date = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                except:
-                    continue
-
-            if isinstance(start_date, datetime) and start_date > datetime.now():
-                upcoming_events.append(event)
-
-    # Sort by start date
-    def get_sort_date(event):
-        start_date = event['start_date']
-        if isinstance(start_date, str):
-            try:
-                return datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            except:
-                return datetime.min
-        return start_date if isinstance(start_date, datetime) else datetime.min
-
-    upcoming_events.sort(key=get_sort_date)
-    upcoming_events = upcoming_events[:6]  # Show only 6 events
+    # Get the next 6 upcoming approved events from the start-date index
+    upcoming_events = data_store.upcoming_events(limit=6)
 
     # Get user's registered events
     user_registrations = []
-    for reg_id, reg in data_store.registrations.items():
-        if reg['user_id'] == user_id:
-            event = data_store.events.get(reg['event_id'])
-            if event:
-                user_registrations.append({
-                    'registration': reg,
-                    'event': event
-                })
+    for reg in data_store.get_user_registrations(user_id):
+        event = data_store.events.get(reg['event_id'])
+        if event:
+            user_registrations.append({
+                'registration': reg,
+                'event': event
+            })
 
     return render_template('student/dashboard.html', 
                          upcoming_events=upcoming_events,
@@ -61,95 +37,73 @@ def dashboard():
 @student_bp.route('/events')
 @login_required('student')
 def events():
-    # Get all approved events
-    approved_events = []
-    for event_id, event in data_store.events.items():
-        if event['status'] == 'approved':
-            approved_events.append(event)
-
     # Apply filters
-    category = request.args.get('category', '')
     search = request.args.get('search', '')
     date_filter = request.args.get('date', '')
+    organizer = request.args.get('organizer', '')
+    facets = {facet: request.args.get(facet, '') for facet in EVENT_FACETS}
+    cursor, per_page = page_args(request.args)
 
-    if category:
-        approved_events = [e for e in approved_events if e['category'] == category]
-
-    if search:
-        search_lower = search.lower()
-        approved_events = [e for e in approved_events if 
-                          search_lower in e['title'].lower() or 
-                          search_lower in e['description'].lower()]
-
-    if date_filter:
-        if date_filter == 'today':
-            today = datetime.now().date()
-            filtered_events = []
-            for e in approved_events:
-                start_date = e['start_date']
-                if isinstance(start_date, str):
-                    try:
-                        start_date = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                    except:
-                        continue
-                if isinstance(start_date, datetime) and start_date.date() == today:
-                    filtered_events.append(e)
-            approved_events = filtered_events
-        elif date_filter == 'this_week':
-            week_start = datetime.now().date()
-            week_end = week_start + timedelta(days=7)
-            filtered_events = []
-            for e in approved_events:
-                start_date = e['start_date']
-                if isinstance(start_date, str):
-                    try:
-                        start_date = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                    except:
-                        continue
-                if isinstance(start_date, datetime) and week_start <= start_date.date() <= week_end:
-                    filtered_events.append(e)
-            approved_events = filtered_events
-        elif date_filter == 'this_month':
-            month_start = datetime.now().replace(day=1).date()
-            if month_start.month == 12:
-                month_end = month_start.replace(year=month_start.year + 1, month=1) - timedelta(days=1)
-            else:
-                month_end = month_start.replace(month=month_start.month + 1) - timedelta(days=1)
-            filtered_events = []
-            for e in approved_events:
-                start_date = e['start_date']
-                if isinstance(start_date, str):
-                    try:
-                        start_date = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                    except:
-                        continue
-                if isinstance(start_date, datetime) and month_start <= start_date.date() <= month_end:
-                    filtered_events.append(e)
-            approved_events = filtered_events
-
-    # Sort by start date
-    def get_sort_date(event):
-        start_date = event['start_date']
-        if isinstance(start_date, str):
-            try:
-                return datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            except:
-                return datetime.min
-        return start_date if isinstance(start_date, datetime) else datetime.min
-
-    approved_events.sort(key=get_sort_date)
-
-    # Get unique categories for filter
-    categories = list(set([e['category'] for e in data_store.events.values() if e['status'] == 'approved']))
+    # Intersect the id sets of every active filter, with live counts per
+    # facet value, and render one page of the matches
+    approved_events, next_cursor, facet_counts = data_store.query_events(
+        facets, date=date_filter, search=search, organizer=organizer,
+        cursor=cursor, limit=per_page)
 
     return render_template('student/events.html', 
                          events=approved_events,
-                         categories=categories,
-                         current_filters={
-                             'category': category,
-                             'search': search,
-                             'date': date_filter
-                         })
+                         next_cursor=next_cursor,
+                         categories=sorted(facet_counts['category']),
+                         facet_counts=facet_counts,
+                         current_filters=dict(facets,
+                                              search=search,
+                                              date=date_filter,
+                                              organizer=organizer))
+
+@student_bp.route('/events/search')
+@login_required('student')
+def search_events():
+    # The events page as JSON: the same filters and cursor, with q as the
+    # search query
+    query = request.args.get('q', '')
+    facets = {facet: request.args.get(facet, '') for facet in EVENT_FACETS}
+    cursor, per_page = page_args(request.args)
+    matches, next_cursor, facet_counts = data_store.query_events(
+        facets, date=request.args.get('date', ''), search=query,
+        organizer=request.args.get('organizer', ''), cursor=cursor, limit=per_page)
+
+    results = []
+    for event in matches:
+        start_date = event['start_date']
+        results.append({
+            'id': event['id'],
+            'title': event['title'],
+            'category': event['category'],
+            'venue': event['venue'],
+            'start_date': start_date.isoformat() if isinstance(start_date, datetime) else start_date,
+            'url': url_for('student.event_detail', event_id=event['id'])
+        })
+
+    return jsonify({'query': query, 'results': results, 'facet_counts': facet_counts,
+                    'next_cursor': next_cursor})
+
+@student_bp.route('/events/suggest')
+@login_required('student')
+def suggest_events():
+    query = request.args.get('q', '')
+    limit = min(request.args.get('limit', 8, type=int), 20)
+
+    suggestions = []
+    for kind, text, record in data_store.suggest(query, limit):
+        if kind == 'event':
+            url = url_for('student.event_detail', event_id=record['id'])
+        elif kind == 'category':
+            url = url_for('student.events', category=text)
+        else:
+            url = url_for('student.events', organizer=record['id'])
+        suggestions.append({'type': kind, 'text': text, 'url': url})
+
+    return jsonify({'query': query, 'suggestions': suggestions})
 
 @student_bp.route('/event/<event_id>')
 @login_required('student')
@@ -161,33 +115,23 @@ def event_detail(event_id):
 
     # Check if user is already registered
     user_id = session['user_id']
-    is_registered = False
-    registration = None
-
-    for reg_id, reg in data_store.registrations.items():
-        if reg['user_id'] == user_id and reg['event_id'] == event_id:
-            is_registered = True
-            registration = reg
-            break
+    registration = data_store.get_registration(user_id, event_id)
+    is_registered = registration is not None
 
     # Get organizer info
     organizer = data_store.users.get(event['organizer_id'], {})
 
     # Get event feedback
     event_feedback = []
-    for fb_id, fb in data_store.feedback.items():
-        if fb['event_id'] == event_id:
-            user = data_store.users.get(fb['user_id'], {})
-            event_feedback.append({
-                'feedback': fb,
-                'user': user
-            })
+    for fb in data_store.get_event_feedback(event_id):
+        user = data_store.users.get(fb['user_id'], {})
+        event_feedback.append({
+            'feedback': fb,
+            'user': user
+        })
 
     # Get all teams for this user (needed for template logic)
-    user_teams = []
-    for team in data_store.teams.values():
-        if user_id in team['members']:
-            user_teams.append(team)
+    user_teams = data_store.get_user_teams(user_id)
 
     return render_template('student/event_detail.html',
                          event=event,
@@ -208,82 +152,72 @@ def register_event(event_id):
 
     user_id = session['user_id']
 
-    # Check if already registered
-    for reg_id, reg in data_store.registrations.items():
-        if reg['user_id'] == user_id and reg['event_id'] == event_id:
+    # One transaction from the duplicate check through the attendee count
+    # update, so concurrent registrations can't race and a team's
+    # registrations are committed together
+    with data_store.transaction():
+        # Check if already registered
+        if data_store.get_registration(user_id, event_id):
             flash('You are already registered for this event', 'warning')
             return redirect(url_for('student.event_detail', event_id=event_id))
 
-    # For team events, check if user is part of a team
-    if event.get('is_competition', False):
-        user_team = None
-        for team in data_store.teams.values():
-            if user_id in team['members'] and team['event_id'] == event_id and team['status'] == 'active':
-                user_team = team
-                break
-        
-        if not user_team:
-            flash('You must create or join a team before registering for this team event', 'error')
-            return redirect(url_for('student.event_detail', event_id=event_id))
-
-        # For team events, register all team members
-        for member_id in user_team['members']:
-            # Check if member is already registered
-            already_registered = False
-            for reg_id, reg in data_store.registrations.items():
-                if reg['user_id'] == member_id and reg['event_id'] == event_id:
-                    already_registered = True
-                    break
-            
-            if not already_registered:
-                # Create registration for team member
-                registration = Registration(member_id, event_id)
-                qr_data = f"SMVEC_EVENT_{event_id}_{registration.id}_{member_id}"
-                qr_code_image = generate_qr_code(qr_data)
-
-                data_store.registrations[registration.id] = {
-                    'id': registration.id,
-                    'user_id': registration.user_id,
-                    'event_id': registration.event_id,
-                    'registered_at': registration.registered_at,
-                    'attended': registration.attended,
-                    'qr_code': qr_code_image
-                }
-
-        # Update event attendee count by team size
-        team_size = len(user_team['members'])
-        event['current_attendees'] += team_size
-
-        flash(f'Team "{user_team["name"]}" successfully registered for the event!', 'success')
-    else:
-        # Check capacity for individual events
-        if event['max_attendees'] and event['current_attendees'] >= event['max_attendees']:
-            flash('Event is full', 'error')
-            return redirect(url_for('student.event_detail', event_id=event_id))
+        new_qr_payloads = []
 
-        # Create registration for individual event
-        registration = Registration(user_id, event_id)
-
-        # Generate QR code with registration details
-        qr_data = f"SMVEC_EVENT_{event_id}_{registration.id}_{user_id}"
-        qr_code_image = generate_qr_code(qr_data)
-
-        data_store.registrations[registration.id] = {
-            'id': registration.id,
-            'user_id': registration.user_id,
-            'event_id': registration.event_id,
-            'registered_at': registration.registered_at,
-            'attended': registration.attended,
-            'qr_code': qr_code_image
-        }
-
-        # Update event attendee count
-        event['current_attendees'] += 1
+        # For team events, check if user is part of a team
+        if event.get('is_competition', False):
+            user_team = data_store.get_user_team(user_id, event_id, active_only=True)
+        
+            if not user_team:
+                flash('You must create or join a team before registering for this team event', 'error')
+                return redirect(url_for('student.event_detail', event_id=event_id))
+
+            # For team events, register all team members
+            for member_id in user_team['members']:
+                # Check if member is already registered
+                if not data_store.get_registration(member_id, event_id):
+                    # Create registration for team member
+                    registration = Registration(member_id, event_id)
+
+                    data_store.set_record('registrations', registration.id, {
+                        'id': registration.id,
+                        'user_id': registration.user_id,
+                        'event_id': registration.event_id,
+                        'registered_at': registration.registered_at,
+                        'attended': registration.attended,
+                        'qr_data': registration.qr_data
+                    })
+                    new_qr_payloads.append(registration.qr_data)
+
+            # The data store keeps event['current_attendees'] in step with
+            # the registrations
+            flash(f'Team "{user_team["name"]}" successfully registered for the event!', 'success')
+        else:
+            # Check capacity for individual events
+            # Count from the registrations index: it includes registrations
+            # other workers made since this one last saved the event
+            if (event['max_attendees']
+                    and data_store.count_event_registrations(event_id) >= event['max_attendees']):
+                flash('Event is full', 'error')
+                return redirect(url_for('student.event_detail', event_id=event_id))
+
+            # Create registration for individual event
+            # The QR image itself is rendered on demand by registration_qr
+            registration = Registration(user_id, event_id)
+
+            data_store.set_record('registrations', registration.id, {
+                'id': registration.id,
+                'user_id': registration.user_id,
+                'event_id': registration.event_id,
+                'registered_at': registration.registered_at,
+                'attended': registration.attended,
+                'qr_data': registration.qr_data
+            })
+            new_qr_payloads.append(registration.qr_data)
 
-        flash('Successfully registered for the event!', 'success')
+            flash('Successfully registered for the event!', 'success')
 
-    # Save data
-    data_store.save_data()
+    # Render the new check-in QR codes off the request thread
+    prerender_qr_codes(new_qr_payloads)
 
     # Send notification
     send_notification(user_id, 'Registration Successful', 
@@ -296,20 +230,16 @@ def register_event(event_id):
 def unregister_event(event_id):
     user_id = session['user_id']
 
-    # Find and remove registration
-    reg_to_remove = None
-    for reg_id, reg in data_store.registrations.items():
-        if reg['user_id'] == user_id and reg['event_id'] == event_id:
-            reg_to_remove = reg_id
-            break
+    with data_store.write_lock():
+        # Find and remove registration
+        reg_to_remove = data_store.get_registration(user_id, event_id)
 
-    if reg_to_remove:
-        del data_store.registrations[reg_to_remove]
+        if reg_to_remove:
+            # Also updates the event's attendee count
+            data_store.remove_record('registrations', reg_to_remove['id'])
 
-        # Update event attendee count
-        event = data_store.events.get(event_id)
-        if event and event['current_attendees'] > 0:
-            event['current_attendees'] -= 1
+    if reg_to_remove:
+        data_store.save_data()
 
         flash('Successfully unregistered from the event', 'info')
     else:
@@ -317,40 +247,73 @@ def unregister_event(event_id):
 
     return redirect(url_for('student.event_detail', event_id=event_id))
 
+@student_bp.route('/qr/<reg_id>.png')
+@login_required('student')
+def registration_qr(reg_id):
+    registration = data_store.registrations.get(reg_id)
+    if not registration or registration['user_id'] != session['user_id']:
+        abort(404)
+
+    qr_data = registration_qr_data(registration)
+    png = get_qr_png(qr_data)
+    response = make_response(png)
+    response.mimetype = 'image/png'
+    if png == FALLBACK_PNG:
+        # A placeholder until the qrcode library is installed: the real
+        # image must replace it, so it gets no validator and is not stored
+        response.cache_control.no_store = True
+        return response
+
+    # The image is a pure function of the payload, so its content hash is a
+    # strong validator and the URL can be cached for as long as it exists.
+    response.set_etag(qr_cache_key(qr_data))
+    response.cache_control.private = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
 @student_bp.route('/my-events')
 @login_required('student')
 def my_events():
     user_id = session['user_id']
+    cursor, per_page = page_args(request.args)
 
-    # Get user's registrations with event details
+    # One page of the user's registrations with event details, newest first
+    registrations = data_store.get_user_registrations(user_id)
+    page_registrations, next_cursor = paginate(
+        registrations, lambda reg: sort_time(reg.get('registered_at')), cursor, per_page,
+        reverse=True)
     registered_events = []
-    for reg_id, reg in data_store.registrations.items():
-        if reg['user_id'] == user_id:
-            event = data_store.events.get(reg['event_id'])
-            if event:
-                registered_events.append({
-                    'registration': reg,
-                    'event': event
-                })
-
-    # Sort by registration date
-    registered_events.sort(key=lambda x: x['registration']['registered_at'], reverse=True)
-
-    # Calculate stats for summary cards
+    for reg in page_registrations:
+        event = data_store.events.get(reg['event_id'])
+        if event:
+            registered_events.append({
+                'registration': reg,
+                'event': event
+            })
+
+    # Calculate stats for summary cards, over every registration
     now = datetime.now()
+    registration_count = 0
     upcoming_count = 0
     attended_count = 0
 
-    for item in registered_events:
+    for reg in registrations:
+        event = data_store.events.get(reg['event_id'])
+        if not event:
+            continue
+        registration_count += 1
         # Ensure start_date is a datetime object before comparison
-        start_date = item['event']['start_date']
+        start_date = event['start_date']
         if isinstance(start_date, datetime) and start_date > now:
             upcoming_count += 1
-        if item['registration']['attended']:
+        if reg['attended']:
             attended_count += 1
 
     return render_template('student/my_events.html', 
                            registered_events=registered_events,
+                           next_cursor=next_cursor,
+                           registration_count=registration_count,
                            upcoming_count=upcoming_count,
                            attended_count=attended_count,
                            datetime=datetime) # <-- ADD THIS LINE
@@ -361,7 +324,7 @@ def my_events():
 def calendar():
     # Get all approved events for calendar view
     approved_events = []
-    for event_id, event in data_store.events.items():
+    for event in data_store.records('events'):
         if event['status'] == 'approved':
             approved_events.append(event)
 
@@ -375,32 +338,29 @@ def submit_feedback(event_id):
     comment = request.form['comment']
 
     # Check if user attended the event
-    attended = False
-    for reg_id, reg in data_store.registrations.items():
-        if reg['user_id'] == user_id and reg['event_id'] == event_id and reg['attended']:
-            attended = True
-            break
+    registration = data_store.get_registration(user_id, event_id)
+    attended = registration is not None and registration['attended']
 
     if not attended:
         flash('You can only provide feedback for events you attended', 'error')
         return redirect(url_for('student.event_detail', event_id=event_id))
 
-    # Check if feedback already exists
-    for fb_id, fb in data_store.feedback.items():
-        if fb['user_id'] == user_id and fb['event_id'] == event_id:
+    with data_store.write_lock():
+        # Check if feedback already exists
+        if data_store.get_feedback(user_id, event_id):
             flash('You have already provided feedback for this event', 'warning')
             return redirect(url_for('student.event_detail', event_id=event_id))
 
-    # Create feedback
-    feedback = Feedback(user_id, event_id, rating, comment)
-    data_store.feedback[feedback.id] = {
-        'id': feedback.id,
-        'user_id': feedback.user_id,
-        'event_id': feedback.event_id,
-        'rating': feedback.rating,
-        'comment': feedback.comment,
-        'created_at': feedback.created_at
-    }
+        # Create feedback
+        feedback = Feedback(user_id, event_id, rating, comment)
+        data_store.add_feedback(feedback.id, {
+            'id': feedback.id,
+            'user_id': feedback.user_id,
+            'event_id': feedback.event_id,
+            'rating': feedback.rating,
+            'comment': feedback.comment,
+            'created_at': feedback.created_at
+        })
 
     flash('Thank you for your feedback!', 'success')
     return redirect(url_for('student.event_detail', event_id=event_id))
\ No newline at end of file
@@ -21,28 +21,26 @@ def create_team(event_id):
     if request.method == 'POST':
         team_name = request.form['team_name']
 
-        # Check if user is already in a team for this event
-        user_teams = [t for t in data_store.teams.values() 
-                     if session['user_id'] in t['members'] and t['event_id'] == event_id and t['status'] == 'active']
-        if user_teams:
-            flash('You are already part of a team for this event', 'error')
-            return redirect(url_for('student.event_detail', event_id=event_id))
-
-        # Create new team
-        team = Team(team_name, session['user_id'], event_id)
-        team_data = {
-            'id': team.id,
-            'name': team.name,
-            'leader_id': team.leader_id,
-            'event_id': team.event_id,
-            'members': team.members,
-            'created_at': team.created_at,
-            'status': team.status,
-            'team_code': team.team_code
-        }
-
-        data_store.teams[team.id] = team_data
-        data_store.save_data()
+        with data_store.write_lock():
+            # Check if user is already in a team for this event
+            if data_store.get_user_team(session['user_id'], event_id, active_only=True):
+                flash('You are already part of a team for this event', 'error')
+                return redirect(url_for('student.event_detail', event_id=event_id))
+
+            # Create new team
+            team = Team(team_name, session['user_id'], event_id)
+            team_data = {
+                'id': team.id,
+                'name': team.name,
+                'leader_id': team.leader_id,
+                'event_id': team.event_id,
+                'members': team.members,
+                'created_at': team.created_at,
+                'status': team.status,
+                'team_code': team.team_code
+            }
+
+            data_store.add_team(team.id, team_data)
 
         flash(f'Team "{team_name}" created successfully! Team code: {team.team_code}', 'success')
         return redirect(url_for('team.my_teams'))
@@ -56,32 +54,29 @@ def join_team(event_id=None):
     if request.method == 'POST':
         team_code = request.form['team_code'].upper()
 
-        # Find team by code
-        team = None
-        for t in data_store.teams.values():
-            if t['team_code'] == team_code and t['status'] == 'active':
-                team = t
-                break
-
-        if not team:
-            flash('Invalid team code', 'error')
-            return render_template('student/join_team.html')
-
-        # Check if user is already in a team for this event
-        user_teams = [t for t in data_store.teams.values() 
-                     if session['user_id'] in t['members'] and t['event_id'] == team['event_id']]
-        if user_teams:
-            flash('You are already part of a team for this event', 'error')
-            return render_template('student/join_team.html')
-
-        # Check team size limit
-        event = data_store.events.get(team['event_id'])
-        if event and len(team['members']) >= event.get('team_size_max', 4):
-            flash('Team is full', 'error')
-            return render_template('student/join_team.html')
+        with data_store.write_lock():
+            # Find team by code
+            team = data_store.get_team_by_code(team_code)
+
+            if not team:
+                flash('Invalid team code', 'error')
+                return render_template('student/join_team.html')
+
+            # Check if user is already in a team for this event
+            if data_store.get_user_team(session['user_id'], team['event_id']):
+                flash('You are already part of a team for this event', 'error')
+                return render_template('student/join_team.html')
+
+            # Check team size limit
+            event = data_store.events.get(team['event_id'])
+            if event and len(team['members']) >= event.get('team_size_max', 4):
+                flash('Team is full', 'error')
+                return render_template('student/join_team.html')
+
+            # Add user to team
+            team['members'].append(session['user_id'])
+            data_store.touch('teams', team['id'])
 
-        # Add user to team
-        team['members'].append(session['user_id'])
         data_store.save_data()
 
         flash(f'Successfully joined team "{team["name"]}"', 'success')
@@ -97,21 +92,20 @@ def join_team(event_id=None):
 @login_required('student')
 def my_teams():
     user_teams = []
-    for team in data_store.teams.values():
-        if session['user_id'] in team['members']:
-            event = data_store.events.get(team['event_id'])
-            team_members = []
-            for member_id in team['members']:
-                member = data_store.users.get(member_id)
-                if member:
-                    team_members.append(member)
-
-            user_teams.append({
-                'team': team,
-                'event': event,
-                'members': team_members,
-                'is_leader': team['leader_id'] == session['user_id']
-            })
+    for team in data_store.get_user_teams(session['user_id']):
+        event = data_store.events.get(team['event_id'])
+        team_members = []
+        for member_id in team['members']:
+            member = data_store.users.get(member_id)
+            if member:
+                team_members.append(member)
+
+        user_teams.append({
+            'team': team,
+            'event': event,
+            'members': team_members,
+            'is_leader': team['leader_id'] == session['user_id']
+        })
 
     return render_template('student/my_teams.html', user_teams=user_teams)
 
@@ -124,11 +118,7 @@ def submit_project(event_id):
         return redirect(url_for('student.events'))
 
     # Find user's team for this event
-    user_team = None
-    for team in data_store.teams.values():
-        if session['user_id'] in team['members'] and team['event_id'] == event_id:
-            user_team = team
-            break
+    user_team = data_store.get_user_team(session['user_id'], event_id)
 
     if not user_team:
         flash('You must be part of a team to submit', 'error')
@@ -139,46 +129,40 @@ def submit_project(event_id):
         content = request.form['content']
         description = request.form['description']
 
-        # Check if team already has a submission
-        existing_submission = None
-        for sub in data_store.submissions.values():
-            if sub['team_id'] == user_team['id'] and sub['event_id'] == event_id:
-                existing_submission = sub
-                break
-
-        if existing_submission:
-            # Update existing submission
-            existing_submission['content'] = content
-            existing_submission['description'] = description
-            existing_submission['submitted_at'] = datetime.now()
-            flash('Submission updated successfully!', 'success')
-        else:
-            # Create new submission
-            submission = Submission(user_team['id'], event_id, submission_type)
-            submission_data = {
-                'id': submission.id,
-                'team_id': submission.team_id,
-                'event_id': submission.event_id,
-                'submission_type': submission.submission_type,
-                'content': content,
-                'description': description,
-                'submitted_at': submission.submitted_at,
-                'status': submission.status,
-                'score': submission.score,
-                'rank': submission.rank
-            }
-            data_store.submissions[submission.id] = submission_data
-            flash('Submission created successfully!', 'success')
+        with data_store.write_lock():
+            # Check if team already has a submission
+            existing_submission = data_store.get_team_submission(user_team['id'], event_id)
+
+            if existing_submission:
+                # Update existing submission
+                existing_submission['content'] = content
+                existing_submission['description'] = description
+                existing_submission['submitted_at'] = datetime.now()
+                data_store.touch('submissions', existing_submission['id'])
+                flash('Submission updated successfully!', 'success')
+            else:
+                # Create new submission
+                submission = Submission(user_team['id'], event_id, submission_type)
+                submission_data = {
+                    'id': submission.id,
+                    'team_id': submission.team_id,
+                    'event_id': submission.event_id,
+                    'submission_type': submission.submission_type,
+                    'content': content,
+                    'description': description,
+                    'submitted_at': submission.submitted_at,
+                    'status': submission.status,
+                    'score': submission.score,
+                    'rank': submission.rank
+                }
+                data_store.set_record('submissions', submission.id, submission_data)
+                flash('Submission created successfully!', 'success')
 
         data_store.save_data()
         return redirect(url_for('team.my_teams'))
 
     # Check for existing submission
-    existing_submission = None
-    for sub in data_store.submissions.values():
-        if sub['team_id'] == user_team['id'] and sub['event_id'] == event_id:
-            existing_submission = sub
-            break
+    existing_submission = data_store.get_team_submission(user_team['id'], event_id)
 
     return render_template('student/submit_project.html', 
                          event=event, 
@@ -195,8 +179,8 @@ def leaderboard(event_id):
 
     # Get all submissions for this event
     event_submissions = []
-    for submission in data_store.submissions.values():
-        if submission['event_id'] == event_id and submission['status'] == 'evaluated':
+    for submission in data_store.find('submissions', 'event_id', event_id):
+        if submission['status'] == 'evaluated':
             team = data_store.teams.get(submission['team_id'])
             if team:
                 event_submissions.append({
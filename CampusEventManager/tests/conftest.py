@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# The app's modules are flat top-level files in CampusEventManager/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """A test client of the app over an empty data store in ``tmp_path``;
+    the store is ``client.store``"""
+    import models
+    from app import app
+
+    shared, store = models.data_store, models.DataStore(str(tmp_path / 'datastore.json'))
+    for module in list(sys.modules.values()):
+        if getattr(module, 'data_store', None) is shared:
+            monkeypatch.setattr(module, 'data_store', store)
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        client.store = store
+        yield client
+
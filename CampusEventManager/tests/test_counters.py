@@ -0,0 +1,52 @@
+import multiprocessing
+
+import pytest
+
+from models import DataStore
+
+pytestmark = pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(),
+                                reason="needs fork to share the test's setup")
+
+
+def _registration(registration_id, user_id):
+    return {'id': registration_id, 'user_id': user_id, 'event_id': 'e1', 'attended': False}
+
+
+def _other_worker(data_file, backend, loaded, go):
+    # A second worker that registers without having seen the first
+    # worker's registration
+    store = DataStore(data_file, backend=backend)
+    loaded.set()
+    go.wait(10)
+    store.set_record('registrations', 'r2', _registration('r2', 'u2'))
+    store.save_data()
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_counter_field_counts_registrations_from_other_workers(tmp_path, monkeypatch, backend):
+    monkeypatch.setenv('DATASTORE_MULTIPROCESS', '1')
+    data_file = str(tmp_path / 'datastore.json')
+    store = DataStore(data_file, backend=backend)
+    store.add_event('e1', {'id': 'e1', 'title': 'Workshop', 'status': 'approved',
+                           'organizer_id': 'o1', 'max_attendees': 1, 'current_attendees': 0})
+
+    context = multiprocessing.get_context('fork')
+    loaded, go = context.Event(), context.Event()
+    worker = context.Process(target=_other_worker, args=(data_file, backend, loaded, go))
+    worker.start()
+    assert loaded.wait(10)
+    store.set_record('registrations', 'r1', _registration('r1', 'u1'))
+    store.save_data()
+    go.set()
+    worker.join(10)
+    assert worker.exitcode == 0
+
+    store.refresh()
+    assert store.count_event_registrations('e1') == 2
+    assert store.events['e1']['current_attendees'] == 2
+    assert store.check_counters() == []
+
+    # The recount was saved for the other workers and the next start
+    reloaded = DataStore(data_file, backend=backend)
+    assert reloaded.events['e1']['current_attendees'] == 2
+    assert reloaded.check_counters() == []
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import DataStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DataStore(str(tmp_path / 'datastore.json'))
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    later = today + timedelta(days=60)
+    events = {
+        'e1': ('Technical', True, True, 'Beginner', today + timedelta(hours=1), 'approved'),
+        'e2': ('Technical', False, False, 'Advanced', today + timedelta(hours=2), 'approved'),
+        'e3': ('Cultural', False, False, 'Beginner', later, 'approved'),
+        'e4': ('Sports', True, True, None, later + timedelta(hours=1), 'approved'),
+        'e5': ('Technical', False, False, 'Beginner', today, 'pending'),
+    }
+    store.add_many('events', {event_id: {
+        'id': event_id, 'title': f'Event {event_id}', 'organizer_id': 'o1',
+        'category': category, 'is_paid': paid, 'is_competition': competition,
+        'difficulty_level': difficulty, 'start_date': start, 'status': status}
+        for event_id, (category, paid, competition, difficulty, start, status)
+        in events.items()})
+    return store
+
+
+def test_counts_without_filters_cover_approved_events(store):
+    events, _, counts = store.query_events()
+    assert [event['id'] for event in events] == ['e1', 'e2', 'e3', 'e4']
+    assert counts == {
+        'category': {'Technical': 2, 'Cultural': 1, 'Sports': 1},
+        'price': {'paid': 2, 'free': 2},
+        'format': {'team': 2, 'individual': 2},
+        'difficulty': {'Beginner': 2, 'Advanced': 1},
+        'date': {'today': 2, 'this_week': 2, 'this_month': 2},
+    }
+
+
+def test_filtered_facet_counts_leave_out_their_own_filter(store):
+    events, _, counts = store.query_events({'category': 'Technical'})
+    assert [event['id'] for event in events] == ['e1', 'e2']
+    assert counts['category'] == {'Technical': 2, 'Cultural': 1, 'Sports': 1}
+    assert counts['price'] == {'paid': 1, 'free': 1}
+    assert counts['difficulty'] == {'Beginner': 1, 'Advanced': 1}
+    assert counts['date'] == {'today': 2, 'this_week': 2, 'this_month': 2}
+
+    # Values the other filters rule out stay listed, with no events
+    events, _, counts = store.query_events({'category': 'Technical', 'price': 'free'})
+    assert [event['id'] for event in events] == ['e2']
+    assert counts['category'] == {'Technical': 1, 'Cultural': 1, 'Sports': 0}
+    assert counts['price'] == {'paid': 1, 'free': 1}
+    assert counts['format'] == {'team': 0, 'individual': 1}
+    assert counts['difficulty'] == {'Beginner': 0, 'Advanced': 1}
+    assert counts['date'] == {'today': 1, 'this_week': 1, 'this_month': 1}
+
+
+def test_date_and_search_filters_narrow_the_counts(store):
+    events, _, counts = store.query_events({'price': 'paid'}, date='today')
+    assert [event['id'] for event in events] == ['e1']
+    assert counts['category'] == {'Technical': 1, 'Cultural': 0, 'Sports': 0}
+    assert counts['price'] == {'paid': 1, 'free': 1}
+    assert counts['date'] == {'today': 1, 'this_week': 1, 'this_month': 1}
+
+    events, _, counts = store.query_events(search='sports')
+    assert [event['id'] for event in events] == ['e4']
+    assert counts['category'] == {'Technical': 0, 'Cultural': 0, 'Sports': 1}
+    assert counts['date'] == {'today': 0, 'this_week': 0, 'this_month': 0}
@@ -0,0 +1,117 @@
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import DataStore
+from pagination import MAX_PAGE_SIZE, PAGE_SIZE, decode_cursor, encode_cursor, page_args, paginate
+
+START = datetime(2026, 3, 1, 10, 0)
+
+
+@pytest.mark.parametrize('entry', [
+    (START, 'e1'),
+    ((START, 'Technical'), 'e2'),
+    (-1.5, 'e3'),
+    ('title', 'e4'),
+])
+def test_cursor_round_trips_its_entry(entry):
+    cursor = encode_cursor(entry)
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == entry
+
+
+@pytest.mark.parametrize('cursor', [
+    None,
+    '',
+    'not a cursor!',
+    encode_cursor((START, 'e1'))[:-3],
+    base64.urlsafe_b64encode(b'{"id": "e1"}').decode(),
+    base64.urlsafe_b64encode(b'[1, 2, 3]').decode(),
+    base64.urlsafe_b64encode(b'[1, 2]').decode(),
+    base64.urlsafe_b64encode(b'\xff\xfe').decode(),
+])
+def test_tampered_cursors_decode_to_none(cursor):
+    assert decode_cursor(cursor) is None
+
+
+def test_page_args_clamp_the_page_size():
+    assert page_args({}) == (None, PAGE_SIZE)
+    assert page_args({'cursor': 'abc', 'per_page': '5'}) == ('abc', 5)
+    assert page_args({'cursor': '', 'per_page': '0'}) == (None, 1)
+    assert page_args({'per_page': str(MAX_PAGE_SIZE + 1)}) == (None, MAX_PAGE_SIZE)
+    assert page_args({'per_page': 'many'}) == (None, PAGE_SIZE)
+
+
+def _pages(fetch, cursor=None):
+    # Every page of a listing from ``cursor``; ``fetch(cursor)`` returns
+    # (records, cursor)
+    pages = []
+    while True:
+        records, cursor = fetch(cursor)
+        pages.append([record['id'] for record in records])
+        if cursor is None:
+            return pages
+
+
+def test_paginate_orders_ties_by_id_across_pages():
+    records = [{'id': f'r{i}', 'day': i // 3} for i in (4, 0, 6, 2, 5, 1, 3)]
+    pages = _pages(lambda cursor: paginate(records, lambda r: r['day'], cursor, limit=2))
+    assert pages == [['r0', 'r1'], ['r2', 'r3'], ['r4', 'r5'], ['r6']]
+
+    pages = _pages(lambda cursor: paginate(records, lambda r: r['day'], cursor, limit=3,
+                                           reverse=True))
+    assert pages == [['r6', 'r5', 'r4'], ['r3', 'r2', 'r1'], ['r0']]
+
+
+def test_paginate_keeps_its_place_when_records_are_added():
+    records = [{'id': f'r{i}', 'day': i} for i in range(4)]
+    first, cursor = paginate(records, lambda r: r['day'], limit=2)
+    # One record lands before the cursor, one after it
+    records += [{'id': 'early', 'day': 0}, {'id': 'late', 'day': 2}]
+    second, cursor = paginate(records, lambda r: r['day'], cursor, limit=2)
+    third, cursor = paginate(records, lambda r: r['day'], cursor, limit=2)
+    assert [r['id'] for r in first + second + third] == ['r0', 'r1', 'late', 'r2', 'r3']
+    assert cursor is None
+
+
+def test_paginate_restarts_on_a_cursor_from_another_listing():
+    records = [{'id': f'r{i}', 'day': i} for i in range(3)]
+    page, _ = paginate(records, lambda r: r['day'], encode_cursor(('title', 'r1')), limit=2)
+    assert [r['id'] for r in page] == ['r0', 'r1']
+
+
+def _add_events(store, starts):
+    store.add_many('events', {event_id: {
+        'id': event_id, 'title': f'Robotics {event_id}', 'status': 'approved',
+        'organizer_id': 'o1', 'category': 'Technical', 'start_date': start}
+        for event_id, start in starts.items()})
+
+
+def test_query_events_pages_through_every_event_once(tmp_path):
+    store = DataStore(str(tmp_path / 'datastore.json'))
+    # Pairs of events share a start time
+    _add_events(store, {f'e{i}': START + timedelta(days=i // 2) for i in range(7)})
+
+    def fetch(cursor, **filters):
+        events, cursor, _ = store.query_events(cursor=cursor, limit=3, **filters)
+        return events, cursor
+
+    assert _pages(fetch) == [['e0', 'e1', 'e2'], ['e3', 'e4', 'e5'], ['e6']]
+    ids = sum(_pages(lambda cursor: fetch(cursor, search='robotics')), [])
+    assert sorted(ids) == [f'e{i}' for i in range(7)]
+
+    # Events added between pages only show up past the cursor
+    first, cursor = fetch(None)
+    _add_events(store, {'early': START - timedelta(days=1), 'late': START + timedelta(days=9)})
+    rest = _pages(fetch, cursor)
+    assert [event['id'] for event in first] + sum(rest, []) == \
+        ['e0', 'e1', 'e2', 'e3', 'e4', 'e5', 'e6', 'late']
+
+
+def test_query_events_restarts_on_a_cursor_from_the_other_order(tmp_path):
+    store = DataStore(str(tmp_path / 'datastore.json'))
+    _add_events(store, {f'e{i}': START + timedelta(days=i) for i in range(3)})
+    _, search_cursor, _ = store.query_events(search='robotics', limit=1)
+    events, _, _ = store.query_events(cursor=search_cursor, limit=2)
+    assert [event['id'] for event in events] == ['e0', 'e1']
@@ -0,0 +1,43 @@
+import threading
+from datetime import datetime
+
+
+def log_in(client, user_id, role):
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['user_role'] = role
+
+
+def test_calendar_renders_event_records(client):
+    client.store.add_event('e1', {
+        'id': 'e1', 'title': 'Robotics Expo', 'description': 'Robots', 'status': 'approved',
+        'organizer_id': 'o1', 'category': 'Technical', 'venue': 'Main Hall',
+        'start_date': datetime(2026, 3, 1, 10), 'end_date': datetime(2026, 3, 1, 16)})
+    log_in(client, 's1', 'student')
+
+    response = client.get('/student/calendar')
+
+    assert response.status_code == 200
+    assert b'Robotics Expo' in response.data
+
+
+def test_concurrent_sign_ups_cannot_share_an_email(client):
+    from app import app
+
+    form = {'full_name': 'Asha', 'email': 'asha@example.edu', 'password': 'secret1',
+            'confirm_password': 'secret1', 'role': 'student', 'register_number': '42',
+            'department': 'CSE'}
+    start = threading.Barrier(4)
+
+    def sign_up():
+        with app.test_client() as other:
+            start.wait()
+            other.post('/auth/register', data=form)
+
+    threads = [threading.Thread(target=sign_up) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(client.store.find('users', 'email', 'asha@example.edu')) == 1
@@ -0,0 +1,83 @@
+from models import DataStore
+from search import TextIndex
+
+
+def _index(records):
+    index = TextIndex(lambda record: record, {'title': 3.0, 'description': 1.0})
+    for record_id, record in records.items():
+        index.add(record_id, record)
+    return index
+
+
+def _ids(results):
+    return [record_id for record_id, _ in results]
+
+
+def test_title_match_outranks_description_match():
+    index = _index({
+        'd': {'title': 'Campus fair', 'description': 'robotics demos all day'},
+        't': {'title': 'Robotics fair', 'description': 'demos all day on campus'},
+    })
+    assert _ids(index.search('robotics')) == ['t', 'd']
+
+
+def test_every_token_must_match():
+    index = _index({
+        'both': {'title': 'Python workshop', 'description': ''},
+        'one': {'title': 'Python meetup', 'description': ''},
+    })
+    assert _ids(index.search('python workshop')) == ['both']
+    assert index.search('python quantum') == []
+
+
+def test_rare_terms_and_short_documents_rank_higher():
+    index = _index({
+        'short': {'title': 'Chess', 'description': ''},
+        'long': {'title': 'Chess club weekly open night', 'description': ''},
+        **{f'c{i}': {'title': 'club', 'description': ''} for i in range(5)},
+    })
+    assert _ids(index.search('chess')) == ['short', 'long']
+    # "chess" is rarer than "club", so it scores more in the same title
+    assert dict(index.search('chess'))['long'] > dict(index.search('club'))['long']
+
+
+def test_prefix_expansion_ranks_exact_terms_first():
+    index = _index({
+        'prefix': {'title': 'Robotics expo', 'description': ''},
+        'exact': {'title': 'Robot expo', 'description': ''},
+        'other': {'title': 'Music expo', 'description': ''},
+    })
+    assert _ids(index.search('robot')) == ['exact', 'prefix']
+    assert sorted(_ids(index.search('rob'))) == ['exact', 'prefix']
+    assert index.search('robots') == []
+
+
+def test_updates_and_removals_are_searchable_at_once():
+    index = _index({'e1': {'title': 'Robotics expo', 'description': ''}})
+    index.remove('e1')
+    index.add('e1', {'title': 'Music night', 'description': ''})
+    assert index.search('robotics') == []
+    assert _ids(index.search('mus')) == ['e1']
+    index.remove('e1')
+    assert index.search('music') == []
+
+
+def test_query_events_ranks_approved_matches_and_applies_filters(tmp_path):
+    store = DataStore(str(tmp_path / 'datastore.json'))
+    events = {
+        'title': ('Robotics challenge', 'Technical', 'approved'),
+        'body': ('Campus day', 'Cultural', 'approved'),
+        'pending': ('Robotics meetup', 'Technical', 'pending'),
+        'other': ('Music night', 'Cultural', 'approved'),
+    }
+    store.add_many('events', {event_id: {
+        'id': event_id, 'title': title, 'category': category, 'status': status,
+        'organizer_id': 'o1', 'start_date': '2026-03-01T10:00:00',
+        'description': 'robotics showcase' if event_id == 'body' else 'an event'}
+        for event_id, (title, category, status) in events.items()})
+
+    found, _, _ = store.query_events(search='robotics')
+    assert [event['id'] for event in found] == ['title', 'body']
+
+    found, _, _ = store.query_events({'category': 'Cultural'}, search='robot')
+    assert [event['id'] for event in found] == ['body']
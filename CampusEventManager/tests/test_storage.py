@@ -0,0 +1,112 @@
+import pytest
+
+import snapshot
+from models import DataStore
+from storage import BinaryStorage, JsonStorage
+
+
+def _event(event_id):
+    return {'id': event_id, 'title': event_id, 'status': 'pending', 'organizer_id': 'o1'}
+
+
+def test_journal_survives_torn_final_line_across_restarts(tmp_path):
+    data_file = str(tmp_path / 'datastore.json')
+    store = DataStore(data_file, backend='journal')
+    store.add_event('e1', _event('e1'))
+    store.add_event('e2', _event('e2'))
+
+    # A crash mid-append leaves half a line at the end of the journal
+    journal = store.storage.journal_file
+    with open(journal, 'ab') as f:
+        f.write(b'{"op":"put","collection":"events","id":"e2","da')
+
+    store = DataStore(data_file, backend='journal')
+    assert {'e1', 'e2'} <= set(store.events)
+    store.add_event('e3', _event('e3'))
+    store.add_event('e4', _event('e4'))
+
+    # Entries appended after the recovery replay on every later restart
+    for _ in range(2):
+        store = DataStore(data_file, backend='journal')
+        assert {'e1', 'e2', 'e3', 'e4'} <= set(store.events)
+    with open(journal, 'rb') as f:
+        assert all(line.endswith(b'\n') for line in f)
+
+
+def test_journal_checkpoint_keeps_records_saved_incrementally(tmp_path, monkeypatch):
+    # Saves between checkpoints are given only their changed records; the
+    # checkpoint must still write every record
+    monkeypatch.setenv('DATASTORE_CHECKPOINT_EVERY', '3')
+    data_file = str(tmp_path / 'datastore.json')
+    store = DataStore(data_file, backend='journal')
+    for i in range(7):
+        store.add_event(f'e{i}', _event(f'e{i}'))
+    store.remove_record('events', 'e0')
+    store.save_data()
+
+    store = DataStore(data_file, backend='journal')
+    assert set(store.events) == {f'e{i}' for i in range(1, 7)}
+
+
+def test_failed_save_stays_pending_across_a_rolled_back_transaction(tmp_path, monkeypatch):
+    data_file = str(tmp_path / 'datastore.json')
+    store = DataStore(data_file, backend='journal')
+    save = store.storage.save
+
+    def failing_save(collections, changes):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(store.storage, 'save', failing_save)
+    store.add_event('e1', _event('e1'))
+    monkeypatch.setattr(store.storage, 'save', save)
+
+    try:
+        with store.transaction():
+            store.add_event('e2', _event('e2'))
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    store.flush()
+
+    store = DataStore(data_file, backend='journal')
+    assert 'e1' in store.events
+    assert 'e2' not in store.events
+
+
+def _flip_last_byte(data):
+    return data[:-1] + bytes([data[-1] ^ 0x01])
+
+
+@pytest.mark.parametrize('damage, message', [
+    (_flip_last_byte, 'checksum'),
+    (lambda data: data[:-10], 'truncated'),
+    (lambda data: data[:snapshot.HEADER.size - 1], 'truncated'),
+    (lambda data: b'NOTASNAP' + data[8:], 'Not a datastore snapshot'),
+    (lambda data: data[:8] + (snapshot.FORMAT_VERSION + 1).to_bytes(2, 'big') + data[10:],
+     'Unsupported snapshot version'),
+])
+def test_snapshot_header_rejects_damaged_data(damage, message):
+    data = snapshot.dumps({'events': {'e1': _event('e1')}})
+    assert snapshot.loads(data) == {'events': {'e1': _event('e1')}}
+    with pytest.raises(snapshot.SnapshotError, match=message):
+        snapshot.loads(damage(data))
+
+
+@pytest.mark.parametrize('storage_class, path_of', [
+    (BinaryStorage, lambda storage: storage.snapshot_file),
+    (JsonStorage, lambda storage: storage.data_file),
+])
+@pytest.mark.parametrize('damage', [_flip_last_byte, lambda data: data[:len(data) // 2]])
+def test_load_recovers_previous_generation_when_newest_is_damaged(tmp_path, storage_class,
+                                                                   path_of, damage):
+    storage = storage_class(str(tmp_path / 'datastore.json'))
+    storage.checkpoint({'events': {'e1': _event('e1')}})
+    storage.checkpoint({'events': {'e1': _event('e1'), 'e2': _event('e2')}})
+
+    path = path_of(storage)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(damage(data))
+
+    assert set(storage_class(storage.data_file).load()['events']) == {'e1'}
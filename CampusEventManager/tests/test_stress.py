@@ -0,0 +1,112 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import DataStore
+
+WORKERS = 8
+ROUNDS = 40
+EVENTS = 5
+
+
+class Abort(Exception):
+    pass
+
+
+def _registration(record_id, worker, event):
+    return {'id': record_id, 'user_id': f'u{worker}', 'event_id': f'e{event}',
+            'attended': False, 'status': 'registered'}
+
+
+def _work(store, worker, errors):
+    try:
+        for i in range(ROUNDS):
+            event = i % EVENTS
+            record_id = f'r{worker}-{i}'
+            store.set_record('registrations', record_id, _registration(record_id, worker, event))
+            store.save_data()
+
+            batch = [f'b{worker}-{i}-{j}' for j in range(3)]
+            store.add_many('registrations', {
+                batch_id: _registration(batch_id, worker, (event + j) % EVENTS)
+                for j, batch_id in enumerate(batch)})
+
+            # Rolled back: neither the registration nor the removal stays
+            try:
+                with store.transaction():
+                    rolled_back = f'x{worker}-{i}'
+                    store.set_record('registrations', rolled_back,
+                                     _registration(rolled_back, worker, event))
+                    store.remove_record('registrations', record_id)
+                    raise Abort
+            except Abort:
+                pass
+
+            store.refresh()
+            for record in store.find('registrations', 'event_id', f'e{event}'):
+                assert record['event_id'] == f'e{event}'
+            cursor = None
+            while True:
+                events, cursor = store.page('events', 'approved_start', cursor, limit=2)
+                if cursor is None:
+                    break
+    except Exception as e:
+        errors.append(e)
+
+
+@pytest.mark.parametrize('backend', ['json', 'shared json', 'journal', 'sqlite'])
+@pytest.mark.parametrize('group_commit_ms', [0, 5])
+def test_concurrent_writes_keep_counters_and_storage_consistent(tmp_path, monkeypatch, backend,
+                                                                 group_commit_ms):
+    if backend == 'shared json':
+        monkeypatch.setenv('DATASTORE_MULTIPROCESS', '1')
+        backend = 'json'
+    data_file = str(tmp_path / 'datastore.json')
+    store = DataStore(data_file, backend=backend, group_commit_ms=group_commit_ms)
+    start = datetime(2026, 1, 1)
+    store.add_many('events', {f'e{i}': {
+        'id': f'e{i}', 'title': f'Event {i}', 'status': 'approved', 'organizer_id': 'o1',
+        'start_date': start + timedelta(days=i), 'current_attendees': 0}
+        for i in range(EVENTS)})
+
+    errors = []
+    threads = [threading.Thread(target=_work, args=(store, worker, errors))
+               for worker in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.flush()
+
+    assert errors == []
+    assert store.check_counters() == []
+    assert len(store.registrations) == WORKERS * ROUNDS * 4
+    assert not any(record_id.startswith('x') for record_id in store.registrations)
+
+    reloaded = DataStore(data_file, backend=backend)
+    for collection in ('events', 'registrations'):
+        assert dict(getattr(reloaded, collection)) == dict(getattr(store, collection))
+    assert reloaded.check_counters() == []
+
+
+def test_refresh_without_changes_does_not_wait_for_readers(tmp_path):
+    store = DataStore(str(tmp_path / 'datastore.json'))
+    reading, release = threading.Event(), threading.Event()
+
+    def reader():
+        with store.read_lock():
+            reading.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    reading.wait(5)
+    refresher = threading.Thread(target=store.refresh)
+    refresher.start()
+    refresher.join(1)
+    finished = not refresher.is_alive()
+    release.set()
+    thread.join()
+    refresher.join()
+    assert finished
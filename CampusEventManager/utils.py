@@ -5,9 +5,7 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
-import qrcode
-import io
-import base64
+import threading
 
 def login_required(role=None):
     def decorator(f):
@@ -32,10 +30,9 @@ def login_required(role=None):
         return decorated_function
     return decorator
 
-def send_notification(user_id, title, message, notification_type='info'):
-    """Send in-app notification to user"""
+def _notification_record(user_id, title, message, notification_type):
     notification = Notification(user_id, title, message, notification_type)
-    data_store.notifications[notification.id] = {
+    return {
         'id': notification.id,
         'user_id': notification.user_id,
         'title': notification.title,
@@ -44,12 +41,33 @@ def send_notification(user_id, title, message, notification_type='info'):
         'read': notification.read,
         'created_at': notification.created_at
     }
+
+def send_notification(user_id, title, message, notification_type='info'):
+    """Send in-app notification to user"""
+    notification = _notification_record(user_id, title, message, notification_type)
+    data_store.set_record('notifications', notification['id'], notification)
     
     # Optional: Send email notification
     user = data_store.users.get(user_id)
     if user:
         send_email(user['email'], title, message)
 
+def send_notifications(user_ids, title, message, notification_type='info'):
+    """Send the same in-app notification to many users as one commit. The
+    emails are sent from a background thread once it has committed."""
+    notifications = [_notification_record(user_id, title, message, notification_type)
+                     for user_id in dict.fromkeys(user_ids)]
+    data_store.add_many('notifications', {n['id']: n for n in notifications})
+
+    emails = [user['email'] for user in map(data_store.users.get, dict.fromkeys(user_ids)) if user]
+    if emails:
+        data_store.after_commit(lambda: threading.Thread(
+            target=_send_emails, args=(emails, title, message), daemon=True).start())
+
+def _send_emails(emails, subject, message):
+    for to_email in emails:
+        send_email(to_email, subject, message)
+
 def send_email(to_email, subject, message):
     """Send email notification (mock implementation for MVP)"""
     # This is a mock implementation
@@ -65,30 +83,10 @@ def send_email(to_email, subject, message):
         print(f"Failed to send email: {e}")
         return False
 
-def generate_qr_code(text):
-    """Generate QR code for event check-in"""
-    try:
-        import qrcode
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(text)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convert to base64 for embedding in HTML
-        buffered = io.BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
-        
-        return img_str
-    except ImportError:
-        # Fallback if qrcode library is not available
-        return "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+def registration_qr_data(registration):
+    """Return the check-in payload encoded in a registration's QR code"""
+    return registration.get('qr_data') or \
+        f"SMVEC_EVENT_{registration['event_id']}_{registration['id']}_{registration['user_id']}"
 
 def allowed_file(filename, allowed_extensions={'png', 'jpg', 'jpeg', 'gif'}):
     """Check if file extension is allowed"""
@@ -102,7 +100,7 @@ def format_datetime(dt):
 def get_user_notifications(user_id, limit=10):
     """Get recent notifications for user"""
     user_notifications = []
-    for notif_id, notif in data_store.notifications.items():
+    for notif in data_store.records('notifications'):
         if notif['user_id'] == user_id:
             user_notifications.append(notif)
     
@@ -115,6 +113,8 @@ def mark_notification_read(notification_id):
     """Mark notification as read"""
     notification = data_store.notifications.get(notification_id)
     if notification:
-        notification['read'] = True
+        with data_store.write_lock():
+            notification['read'] = True
+            data_store.touch('notifications', notification_id)
         return True
     return False